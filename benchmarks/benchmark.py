@@ -0,0 +1,231 @@
+"""
+Benchmarks for src/image_editor/image_editor.py on deterministic synthetic corpora.
+
+    python -m benchmarks.benchmark                          # run all cases
+    python -m benchmarks.benchmark --corpus products --case editor crop_box
+    python -m benchmarks.benchmark --save-baseline benchmarks/baseline.json
+    python -m benchmarks.benchmark --compare benchmarks/baseline.json
+
+Each case runs in a separate spawned process, so peak RSS belongs to that case only.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from src.batch.batch import editor_options
+from src.config.config import Configuration
+from src.image_editor.image_editor import EditorManager, GeometryPlan, ImageProcessor
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is not reported there
+    resource = None
+
+CORPUS_DIRECTORY = Path(__file__).parent / 'corpus'
+SEED = 20221118
+
+# Name: list of (width, height, image mode, file format, count)
+CORPORA = {
+    'products': [(1200, 900, 'RGB', 'JPEG', 6), (3000, 2000, 'RGB', 'JPEG', 4), (6000, 4000, 'RGB', 'JPEG', 2)],
+    'rgba_png': [(1600, 1200, 'RGBA', 'PNG', 4)],
+    'palette_gif': [(800, 800, 'P', 'GIF', 6)],
+    'huge_tiff': [(8000, 6000, 'RGB', 'TIFF', 1)],
+    'thumbnails': [(160, 120, 'RGB', 'JPEG', 30)],
+}
+SUFFIXES = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'TIFF': '.tiff'}
+CASES = ('editor', 'decode', 'crop_box', 'square', 'remove_transparency', 'resize', 'save')
+
+
+def make_image(width, height, mode, rng):
+    """
+    White background product: several colored shapes inside a random margin
+    """
+    image = Image.new('RGBA', (width, height), (255, 255, 255, 0 if mode == 'RGBA' else 255))
+    draw = ImageDraw.Draw(image)
+    left, upper = rng.randint(0, width // 4), rng.randint(0, height // 4)
+    right, lower = width - rng.randint(0, width // 4), height - rng.randint(0, height // 4)
+    for _ in range(rng.randint(2, 6)):
+        x0, y0 = rng.randint(left, right - 1), rng.randint(upper, lower - 1)
+        x1, y1 = rng.randint(x0, right), rng.randint(y0, lower)
+        color = (rng.randint(0, 240), rng.randint(0, 240), rng.randint(0, 240), 255)
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)((x0, y0, x1, y1), fill=color)
+    return image.convert(mode)
+
+
+def make_corpus(name, scale=1.0):
+    """
+    Generate corpus files once, same seed always gives the same images
+    :param name: Corpus name from CORPORA
+    :param scale: Factor for image sizes, for quick runs
+    :return: Path of corpus directory
+    """
+    directory = CORPUS_DIRECTORY / f'{name}_{scale:g}'
+    if directory.exists():
+        return directory
+    partial = directory.with_name(directory.name + '.partial')
+    partial.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(f'{SEED}-{name}')
+    for width, height, mode, file_format, count in CORPORA[name]:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        for index in range(count):
+            image = make_image(*size, mode, rng)
+            image.save(partial / f'{size[0]}x{size[1]}_{index}{SUFFIXES[file_format]}', file_format)
+    partial.rename(directory)
+    return directory
+
+
+def _settings():
+    config = Configuration.DEFAULT_CONFIG
+    return config['output_image_settings'], editor_options(config)
+
+
+def _prepare(case, files, image_settings, options):
+    """
+    Inputs for the case, prepared before timing starts
+    """
+    processor = ImageProcessor()
+    color_limits = processor._get_color_limits(image_settings)
+    size = (image_settings['width'], image_settings['height'])
+    if case in ('editor', 'decode'):
+        return files
+    images = []
+    for file in files:
+        image = Image.open(file)
+        image.load()
+        crop_box = processor._get_crop_box(image, color_limits) or (0, 0) + image.size
+        if case == 'crop_box':
+            images.append(image)
+        elif case in ('square', 'remove_transparency'):
+            images.append(image.crop(crop_box))
+        elif case == 'resize':
+            images.append((image, GeometryPlan(crop_box, options['square'], size)))
+        elif case == 'save':
+            images.append((processor.process_image(image, image_settings, **options), file.suffix))
+    return images
+
+
+def _run_case(case, items, image_settings, options, output_directory):
+    processor = ImageProcessor()
+    color_limits = processor._get_color_limits(image_settings)
+    for index, item in enumerate(items):
+        if case == 'editor':
+            EditorManager(item.name, str(item.parent), output_directory, image_settings, **options)()
+        elif case == 'decode':
+            with Image.open(item) as image:
+                image.load()
+        elif case == 'crop_box':
+            processor._get_crop_box(item, color_limits)
+        elif case == 'square':
+            processor._make_square_image(item, 'A' in item.getbands() or item.mode == 'P')
+        elif case == 'remove_transparency':
+            processor._remove_transparency(item)
+        elif case == 'resize':
+            processor._resize_to_plan(item[0], item[1], reducing_gap=options.get('fast_decode') and 2.0 or None)
+        elif case == 'save':
+            item[0].save(f'{output_directory}/{index}{item[1]}', quality=image_settings['quality'])
+
+
+def run_case(corpus_directory, case, repeat):
+    """
+    Run one case in current process, best of repeat runs
+    :return: Dict with seconds, images, megapixels and peak_rss_mb
+    """
+    files = sorted(Path(corpus_directory).iterdir())
+    image_settings, options = _settings()
+    items = _prepare(case, files, image_settings, options)
+    megapixels = 0
+    for file in files:
+        with Image.open(file) as image:
+            megapixels += image.size[0] * image.size[1] / 1e6
+    best = math.inf
+    with tempfile.TemporaryDirectory() as output_directory:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            _run_case(case, items, image_settings, options, output_directory)
+            best = min(best, time.perf_counter() - started)
+    peak_rss = None
+    if resource:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+    return {
+        'seconds': round(best, 4),
+        'images': len(files),
+        'images_per_second': round(len(files) / best, 2),
+        'megapixels_per_second': round(megapixels / best, 2),
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss else None,
+    }
+
+
+def run_isolated(corpus_directory, case, repeat):
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, (str(corpus_directory), case, repeat))
+
+
+def compare(results, baseline, threshold):
+    """
+    Print speed ratio of each case against the baseline
+    :return: List of regressed case keys
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = baseline[key]['seconds'] / result['seconds']
+        mark = ''
+        if ratio < 1 - threshold:
+            mark = '  REGRESSION'
+            regressions.append(key)
+        print(f'{key:<36}{ratio:>8.2f}x{mark}')
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.benchmark', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', nargs='+', choices=CORPORA, default=list(CORPORA))
+    parser.add_argument('--case', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--scale', type=float, default=1.0, help='Factor for corpus image sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each case, best one is reported')
+    parser.add_argument('--output', help='Save results to JSON file')
+    parser.add_argument('--save-baseline', help='Save results as baseline JSON file')
+    parser.add_argument('--compare', help='Compare results with baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Slowdown reported as regression')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    print(f"{'case':<36}{'images/s':>10}{'MP/s':>10}{'seconds':>10}{'RSS MB':>10}")
+    for corpus in args.corpus:
+        corpus_directory = make_corpus(corpus, args.scale)
+        for case in args.case:
+            key = f'{corpus}/{case}'
+            result = results[key] = run_isolated(corpus_directory, case, args.repeat)
+            print(f"{key:<36}{result['images_per_second']:>10}{result['megapixels_per_second']:>10}"
+                  f"{result['seconds']:>10}{result['peak_rss_mb'] or '-':>10}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as json_file:
+                json.dump(results, json_file, indent=2)
+    if args.compare:
+        with open(args.compare) as json_file:
+            baseline = json.load(json_file)
+        print(f'\nSpeed against {args.compare}:')
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import traceback
 
@@ -38,6 +39,8 @@ def excepthook(exc_type, exc_value, exc_tb):
 
 
 if __name__ == '__main__':
+    # Required for process pool engine in frozen Windows builds
+    multiprocessing.freeze_support()
     sys._excepthook = sys.excepthook
     sys.excepthook = excepthook
     app = QApplication(sys.argv)
@@ -0,0 +1,361 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from src.cache.cache import CachingManager, ResultCache, fingerprint, settings_key
+from src.control.control import BatchControl, Cancelled
+from src.dedup.dedup import find_duplicates, link_outputs
+from src.errors.errors import error_record, is_damaged
+from src.journal.journal import BatchJournal, NullJournal
+from src.image_editor.image_editor import EditorManager
+from src.loader.loader import format_names
+from src.pipeline.pipeline import PipelineExecutor
+from src.profiler import profiler
+from src.scanner.scanner import DirectoryScanner
+from src.scheduler.scheduler import MemoryScheduler, estimate_memory
+
+WORKER_ENGINES = ('thread', 'process', 'pipeline')
+
+
+def list_images(directory: str, input_formats: list, recursive=False):
+    """
+    List image file names in directory
+    :param directory: Path to the folder with images
+    :param input_formats: List of allowed file suffixes, for ex. ['.jpg', '.png']
+    :param recursive: True to include images from subfolders
+    :return: List of file names, relative paths for images in subfolders
+    """
+    return DirectoryScanner(input_formats, recursive).scan(directory)
+
+
+def editor_options(settings: dict, no_rewrite=False, opaque=False, ignore_image_metadata=False,
+                   simple_formats=True, profile_stages=False):
+    """
+    Collect keyword arguments for ImageEditor from configuration and run options
+    :param settings: Configuration dict
+    :return: Dict of ImageEditor keyword arguments
+    """
+    advanced_settings = settings['advanced_settings']
+    return {
+        'no_rewrite': no_rewrite,
+        'crop': advanced_settings['crop'],
+        'square': advanced_settings['square'],
+        'opaque': opaque,
+        'fit': advanced_settings['fit'],
+        'fast_decode': advanced_settings['fast_decode'],
+        'square_fill_color': advanced_settings['square_fill_color'],
+        'opaque_fill_color': advanced_settings['opaque_fill_color'],
+        'strip_memory_mb': settings.get('strip_memory_mb', 0),
+        'encoder': settings.get('encoder'),
+        'max_image_pixels': settings.get('max_image_megapixels', 0) * 10 ** 6,
+        # Files are opened only as formats of their allowed suffixes
+        'image_formats': format_names(settings['input_formats']) or None,
+        'ignore_image_metadata': ignore_image_metadata,
+        'simple_formats': simple_formats,
+        'profile_stages': profile_stages
+    }
+
+
+class BatchReport:
+    """
+    Results of the batch run with throughput summary
+    """
+
+    def __init__(self):
+        self.results = []
+        self.errors = []
+        self.skipped = 0
+        # Images not processed because the batch was cancelled
+        self.cancelled = 0
+        # Names of damaged images processed with truncated loading after they failed
+        self.recovered = []
+        # Images done by the stopped batch which this one resumed
+        self.resumed = 0
+        # First image name: list of duplicate names, their outputs are linked
+        self.duplicates = {}
+        self.peak_in_flight_bytes = 0
+        self.wall_time = 0.0
+
+    @property
+    def images_done(self):
+        return len(self.results)
+
+    @property
+    def input_bytes(self):
+        return sum(result['input_size'] for result in self.results)
+
+    @property
+    def output_bytes(self):
+        return sum(result['output_size'] for result in self.results)
+
+    def error_records(self):
+        """
+        Failed images with their stage, exception and traceback, to show or save them at once
+        :return: List of dicts, see error_record()
+        """
+        return [error_record(image_name, err) for image_name, err in self.errors]
+
+    def profile_summary(self):
+        """
+        Per-stage percentiles of images processed with profile_stages option
+        """
+        return profiler.summarize(self.results)
+
+    def encoding_summary(self):
+        """
+        Encoded files, their size and encoding time by output format, to compare encoder settings.
+        Linked duplicates are not encoded and not counted.
+        :return: Dict of output suffix to dict of files, output_mb, seconds and ms_per_file
+        """
+        totals = {}
+        for result in self.results:
+            for suffix, (files, size, seconds) in (result.get('encoding') or {}).items():
+                total = totals.setdefault(suffix, [0, 0, 0.0])
+                total[0] += files
+                total[1] += size
+                total[2] += seconds
+        return {suffix: {
+            'files': files,
+            'output_mb': round(size / 2 ** 20, 2),
+            'seconds': round(seconds, 3),
+            'ms_per_file': round(seconds / files * 1000, 1)
+        } for suffix, (files, size, seconds) in sorted(totals.items())}
+
+    def summary(self):
+        """
+        Throughput summary of the batch
+        :return: Dict with counters and rates
+        """
+        wall_time = self.wall_time or float('inf')
+        return {
+            'images': self.images_done,
+            'errors': len(self.errors),
+            'skipped': self.skipped,
+            'cancelled': self.cancelled,
+            'recovered': len(self.recovered),
+            'resumed': self.resumed,
+            'duplicates': sum(len(names) for names in self.duplicates.values()),
+            'oversized': sum(len(result.get('oversized', ())) for result in self.results),
+            'wall_time': round(self.wall_time, 3),
+            'images_per_second': round(self.images_done / wall_time, 2),
+            'input_mb_per_second': round(self.input_bytes / 2 ** 20 / wall_time, 2),
+            'input_mb': round(self.input_bytes / 2 ** 20, 2),
+            'output_mb': round(self.output_bytes / 2 ** 20, 2),
+            'peak_in_flight_mb': round(self.peak_in_flight_bytes / 2 ** 20, 2),
+        }
+
+
+class BatchRunner:
+    """
+    Runs ImageEditor for a list of images in a thread or process pool.
+    :param settings: Configuration dict with directories, output_image_settings, worker_limit,
+    worker_engine, pipeline settings, memory_budget_mb and duplicates
+    :param options: ImageEditor keyword arguments, see editor_options()
+    :param use_cache: True to skip images with up to date output, see ResultCache
+    :param control: BatchControl to cancel, pause and resume the batch from another thread
+    :param use_journal: True to record the batch in BatchJournal and resume the stopped batch
+    """
+
+    def __init__(self, settings: dict, options: dict, use_cache=False, control=None, use_journal=False):
+        self.settings = settings
+        self.options = options
+        self.control = control or BatchControl()
+        # Images are admitted to the pool by their estimated memory, see stats() for monitoring
+        self.scheduler = MemoryScheduler(settings.get('memory_budget_mb', 0) * 2 ** 20, self.max_in_flight())
+        self.cache = None
+        if use_cache:
+            self.cache = ResultCache(
+                settings['output_directory'], settings_key(settings['output_image_settings'], options))
+        self.journal = NullJournal()
+        if use_journal:
+            self.journal = BatchJournal(settings['input_directory'], settings['output_directory'],
+                                        settings_key(settings['output_image_settings'], options))
+
+    def make_manager(self, image_name, options=None):
+        # Events of the control can not be pickled to process pool workers
+        in_process = self.settings.get('worker_engine', 'thread') == 'process'
+        manager = EditorManager(
+            image_name,
+            self.settings['input_directory'],
+            self.settings['output_directory'],
+            self.settings['output_image_settings'],
+            control=None if in_process else self.control,
+            **(options or self.options))
+        return CachingManager(manager) if self.cache else manager
+
+    def _estimate(self, images_to_work):
+        """
+        Estimated memory of each image from its header, only if memory budget is set
+        :return: Generator of (image name, bytes)
+        """
+        if not self.scheduler.budget:
+            return ((image_name, 0) for image_name in images_to_work)
+        input_directory = self.settings['input_directory']
+        strip_memory = self.settings.get('strip_memory_mb', 0) * 2 ** 20
+        return ((image_name, estimate_memory(
+            f'{input_directory}/{image_name}', self.settings['output_image_settings'], strip_memory))
+            for image_name in images_to_work)
+
+    def max_in_flight(self):
+        workers = max(1, self.settings['worker_limit'])
+        if self.settings.get('worker_engine', 'thread') == 'pipeline':
+            pipeline = self.settings['pipeline']
+            # Prefetched and waiting for writer images are in flight too
+            return workers + pipeline['prefetch'] + 3 * pipeline['writers']
+        return workers
+
+    def make_executor(self):
+        workers = max(1, self.settings['worker_limit'])
+        engine = self.settings.get('worker_engine', 'thread')
+        if engine == 'pipeline':
+            pipeline = self.settings['pipeline']
+            return PipelineExecutor(workers, pipeline['readers'], pipeline['writers'], pipeline['prefetch'])
+        if engine == 'process':
+            # Only file names and settings are pickled to the workers and small result
+            # records come back. Spawned processes do not inherit GUI threads and locks.
+            # Ctrl+C cancels the batch in the main process, workers finish their images.
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN))
+        return ThreadPoolExecutor(max_workers=workers)
+
+    def _link_duplicates(self, result: dict, report: BatchReport):
+        input_directory = self.settings['input_directory']
+        for duplicate_name in report.duplicates.get(result['image_name'], ()):
+            try:
+                duplicate = link_outputs(
+                    result, duplicate_name, input_directory, self.settings['output_directory'],
+                    self.settings['output_image_settings'], self.options.get('no_rewrite'),
+                    self.settings['duplicates'].get('hardlink', True))
+                if self.cache:
+                    duplicate['fingerprint'] = fingerprint(f'{input_directory}/{duplicate_name}')
+                    self.cache.record(duplicate)
+            except OSError as err:
+                report.errors.append((duplicate_name, err))
+                self.journal.failed(duplicate_name, error_record(duplicate_name, err))
+            else:
+                report.results.append(duplicate)
+                self.journal.done(duplicate)
+
+    def _process(self, executor, images_to_work: list, options: dict, report, progress, total: int, done=0,
+                 recovery=False):
+        """
+        Admit images to the executor by the scheduler and collect their results into report
+        :param options: ImageEditor keyword arguments of these images
+        :param recovery: True if images are processed again with truncated loading
+        :return: Tuple (dict of failed image name: exception, done images)
+        """
+        self.scheduler.put(self._estimate(images_to_work))
+        failed = {}
+        futures = {}
+        while self.scheduler.queue_depth or futures:
+            if self.control.cancelled:
+                for image_name in self.scheduler.drop():
+                    report.cancelled += 1 + len(report.duplicates.pop(image_name, ()))
+            elif not self.control.paused:
+                for image_name, size in self.scheduler.admit():
+                    self.journal.started(image_name)
+                    futures[executor.submit(self.make_manager(image_name, options))] = image_name, size
+            if not futures:
+                # Paused with nothing in work, or everything is dropped
+                self.control.wait()
+                continue
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                image_name, size = futures.pop(future)
+                self.scheduler.release(size)
+                try:
+                    result = future.result()
+                except Cancelled:
+                    report.cancelled += 1 + len(report.duplicates.pop(image_name, ()))
+                except Exception as err:
+                    failed[image_name] = err
+                else:
+                    report.results.append(result)
+                    self.journal.done(result)
+                    if recovery:
+                        report.recovered.append(image_name)
+                    if self.cache:
+                        self.cache.record(result)
+                    self._link_duplicates(result, report)
+                done += 1
+                if progress:
+                    progress(done, total)
+        return failed, done
+
+    def run(self, images_to_work: list, progress=None, pool=None):
+        """
+        Process images in thread or process pool, until all are done or the batch is cancelled.
+        With journal the stopped batch of the same images and settings is resumed.
+        :param images_to_work: List of image file names in input directory
+        :param progress: Callable, receives (done, total) after each image
+        :param pool: Executor from make_executor() to reuse, new one is created and shut down if None
+        :return: BatchReport
+        """
+        report = BatchReport()
+        started = time.perf_counter()
+        try:
+            self._run(images_to_work, report, progress, pool)
+        finally:
+            self.journal.close()
+        if self.cache:
+            self.cache.save()
+        report.wall_time = time.perf_counter() - started
+        return report
+
+    def _run(self, images_to_work: list, report: BatchReport, progress, pool):
+        resumed = self.journal.resume(images_to_work)
+        if resumed:
+            # Images done before the batch was stopped keep their outputs, so no_rewrite makes no copies of them
+            for record in resumed.values():
+                if self.cache and 'fingerprint' in record:
+                    self.cache.record(record)
+            report.resumed = len(resumed)
+            images_to_work = [image_name for image_name in images_to_work if image_name not in resumed]
+        if self.cache:
+            input_directory = self.settings['input_directory']
+            stale = [image_name for image_name in images_to_work
+                     if not self.cache.is_fresh(image_name, f'{input_directory}/{image_name}')]
+            report.skipped = len(images_to_work) - len(stale)
+            images_to_work = stale
+        duplicates = self.settings.get('duplicates', {})
+        if duplicates.get('detect') and len(images_to_work) > 1:
+            # Each distinct image is processed once, outputs of the rest are linked after it
+            try:
+                report.duplicates = find_duplicates(
+                    self.settings['input_directory'], images_to_work, duplicates.get('similar'),
+                    self.options.get('simple_formats', True), self.options.get('opaque'),
+                    self.settings['worker_limit'], (self.options.get('encoder') or {}).get('format', 'auto'),
+                    self.control)
+            except Cancelled:
+                report.cancelled, images_to_work = len(images_to_work), []
+            linked = {image_name for names in report.duplicates.values() for image_name in names}
+            images_to_work = [image_name for image_name in images_to_work if image_name not in linked]
+
+        total = len(images_to_work)
+        if total:
+            executor = pool or self.make_executor()
+            try:
+                failed, done = self._process(executor, images_to_work, self.options, report, progress, total)
+                retry = [image_name for image_name, err in failed.items() if is_damaged(err)]
+                if retry and self.settings.get('retry_truncated') and not self.options.get('ignore_image_metadata') \
+                        and not self.control.cancelled:
+                    # Damaged files are processed once more from their decodable part
+                    for image_name in retry:
+                        del failed[image_name]
+                    retried, _ = self._process(executor, retry, {**self.options, 'ignore_image_metadata': True},
+                                               report, progress, total + len(retry), done, recovery=True)
+                    failed.update(retried)
+            finally:
+                if pool is None:
+                    executor.shutdown(wait=True)
+            for image_name, err in failed.items():
+                report.errors.append((image_name, err))
+                self.journal.failed(image_name, error_record(image_name, err))
+                if self.cache:
+                    self.cache.forget(image_name)
+                for duplicate_name in report.duplicates.get(image_name, ()):
+                    report.errors.append((duplicate_name, err))
+            report.peak_in_flight_bytes = self.scheduler.peak_in_flight_bytes
+        if not self.control.cancelled:
+            self.journal.finish()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+
+from src.config.config import Configuration
+
+# Options that do not change output pixels or file format
+IGNORED_OPTIONS = ('no_rewrite', 'profile_stages')
+
+
+def file_hash(path: str, data=None):
+    """
+    Content hash of the file
+    :param path: File path
+    :param data: File bytes if they are already read
+    :return: Hex digest string
+    """
+    if data is not None:
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path: str, data=None):
+    """
+    Size and modification time of the file, plus its content hash for the slow path
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash(path, data)}
+
+
+def settings_key(image_settings: dict, options: dict):
+    """
+    Hash of all settings that affect output image
+    :param image_settings: output_image_settings dict
+    :param options: ImageEditor keyword arguments
+    :return: Hex digest string
+    """
+    effective = {
+        'image_settings': image_settings,
+        'options': {key: value for key, value in options.items() if key not in IGNORED_OPTIONS}
+    }
+    return hashlib.blake2b(json.dumps(effective, sort_keys=True).encode(), digest_size=20).hexdigest()
+
+
+class CachingManager:
+    """
+    Fingerprints input file of EditorManager in the same worker, before processing it
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.fingerprint = None
+
+    def __call__(self):
+        input_fingerprint = fingerprint(self.manager.input_path)
+        result = self.manager()
+        result['fingerprint'] = input_fingerprint
+        return result
+
+    # Stages for PipelineExecutor, fingerprint is taken from the bytes already read
+    def read(self):
+        data = self.manager.read()
+        self.fingerprint = fingerprint(self.manager.input_path, data)
+        return data
+
+    def process(self, data=None):
+        return self.manager.process(data)
+
+    def save(self, editor):
+        result = self.manager.save(editor)
+        result['fingerprint'] = self.fingerprint
+        return result
+
+
+class ResultCache:
+    """
+    Persistent record of processed images, one file per output directory.
+    Image is up to date if its output files are untouched, settings are the same
+    and input file is the same: by size and modification time, or by content hash if
+    only modification time has changed.
+    :param output_directory: Output directory of the batch
+    :param settings: settings_key() of the batch
+    """
+    CACHE_FOLDER = os.path.join(Configuration.APP_CONFIG_FOLDER, 'cache')
+
+    def __init__(self, output_directory: str, settings: str):
+        directory_key = hashlib.blake2b(os.path.abspath(output_directory).encode(), digest_size=16).hexdigest()
+        self.path = os.path.join(self.CACHE_FOLDER, f'{directory_key}.json')
+        self.settings = settings
+        self.entries = self._load()
+
+    def is_fresh(self, image_name: str, input_path: str):
+        """
+        Check if output of the image is up to date
+        :param image_name: Image file name
+        :param input_path: Path of input file
+        :return: True if image can be skipped
+        """
+        entry = self.entries.get(image_name)
+        if not entry or entry['settings'] != self.settings or 'outputs' not in entry:
+            return False
+        try:
+            input_stat = os.stat(input_path)
+            for output_path, output_size, output_mtime_ns in entry['outputs']:
+                output_stat = os.stat(output_path)
+                if (output_stat.st_size, output_stat.st_mtime_ns) != (output_size, output_mtime_ns):
+                    return False
+        except OSError:
+            return False
+        cached = entry['input']
+        if input_stat.st_size != cached['size']:
+            return False
+        if input_stat.st_mtime_ns != cached['mtime_ns']:
+            # File was touched or copied again, compare the content
+            if file_hash(input_path) != cached['hash']:
+                return False
+            cached['mtime_ns'] = input_stat.st_mtime_ns
+        return True
+
+    def record(self, result: dict):
+        """
+        Save result record of CachingManager
+        """
+        outputs = []
+        for output_path in result['output_paths']:
+            output_stat = os.stat(output_path)
+            outputs.append((output_path, output_stat.st_size, output_stat.st_mtime_ns))
+        self.entries[result['image_name']] = {
+            'input': result['fingerprint'],
+            'settings': self.settings,
+            'outputs': outputs
+        }
+
+    def forget(self, image_name: str):
+        self.entries.pop(image_name, None)
+
+    def save(self):
+        os.makedirs(self.CACHE_FOLDER, exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as cache_file:
+            json.dump(self.entries, cache_file)
+        os.replace(temp_path, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
@@ -0,0 +1,263 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+
+from src.batch.batch import WORKER_ENGINES, BatchRunner, editor_options, list_images
+from src.config.config import Configuration, check_renditions, parse_rendition
+from src.control.control import BatchControl
+from src.encoder.encoder import OUTPUT_FORMATS
+from src.errors import errors
+from src.profiler import profiler
+from src.watcher.watcher import FolderWatcher, watch_folder
+
+
+def rendition_argument(text: str):
+    # argparse shows the message of ArgumentTypeError only
+    try:
+        return parse_rendition(text)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description='Process all images in the input directory without GUI.')
+    parser.add_argument('-i', '--input', help='Input directory, default is taken from config')
+    parser.add_argument('-o', '--output', help='Output directory, default is taken from config')
+    parser.add_argument('-w', '--workers', type=int, help='Worker limit, default is taken from config')
+    parser.add_argument('-m', '--memory-budget', type=int, help='Memory budget in MB, 0 for no limit')
+    parser.add_argument('--max-megapixels', type=int,
+                        help='Reject larger images as possible decompression bombs, 0 for PIL default limit of about 179 megapixels')
+    parser.add_argument('--strip-memory', type=int,
+                        help='Decode larger PNG and uncompressed TIFF images in strips of this many MB, 0 to disable')
+    parser.add_argument('-e', '--engine', choices=WORKER_ENGINES, help='Worker engine, default is taken from config')
+    parser.add_argument('--readers', type=int, help='Reading threads of pipeline engine')
+    parser.add_argument('--writers', type=int, help='Writing threads of pipeline engine')
+    parser.add_argument('--prefetch', type=int, help='Files read ahead by pipeline engine')
+    parser.add_argument('--recursive', action='store_true', help='Include images from input subfolders')
+    parser.add_argument('--width', type=int, help='Output image width')
+    parser.add_argument('--height', type=int, help='Output image height')
+    parser.add_argument('--quality', type=int, help='Output image quality')
+    parser.add_argument('--max-size', type=int, dest='max_size_kb',
+                        help='Maximum output file size in KB, quality is lowered to fit, 0 for no limit')
+    parser.add_argument('-r', '--rendition', action='append', type=rendition_argument, metavar='WxH[:key=value...]',
+                        help='Output rendition, can be repeated, replaces renditions from config. '
+                             'Keys: quality, max_size_kb, format, suffix, subfolder')
+    parser.add_argument('--no-rewrite', action='store_true', help='Do not overwrite existing output files')
+    parser.add_argument('--opaque', action='store_true', help='Remove transparency from output images')
+    parser.add_argument('--ignore-image-metadata', action='store_true', help='Load truncated images')
+    parser.add_argument('--no-retry', action='store_true',
+                        help='Do not process images which failed to decode again with truncated loading')
+    parser.add_argument('--preserve-formats', action='store_true', help='Keep input file formats')
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                        help='Output format, auto is JPEG or PNG for transparent images, default is taken from config')
+    parser.add_argument('--progressive', action='store_true', help='Save progressive JPEG')
+    parser.add_argument('--png-compress-level', type=int, choices=range(10), metavar='0-9',
+                        help='PNG compression level, 1 is the fastest')
+    parser.add_argument('--webp-method', type=int, choices=range(7), metavar='0-6',
+                        help='WebP encoding method, 0 is the fastest, 6 makes the smallest files')
+    parser.add_argument('--lossless', action='store_true', help='Save lossless WebP')
+    parser.add_argument('--no-cache', action='store_true', help='Process images with up to date output too')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Start a new batch instead of resuming the stopped batch of the same images and settings')
+    parser.add_argument('--no-dedup', action='store_true', help='Process equal input images separately')
+    parser.add_argument('--similar', action='store_true',
+                        help='Find duplicates by downscaled image comparison too, decodes every image once more')
+    parser.add_argument('--duplicates-report', help='Save found duplicates to JSON file')
+    parser.add_argument('--profile', action='store_true', help='Print per-stage timings summary')
+    parser.add_argument('--profile-json', help='Save per-stage timings of each image to JSON file')
+    parser.add_argument('--profile-csv', help='Save per-stage timings of each image to CSV file')
+    parser.add_argument('--errors-json', help='Save failed images with stage and traceback to JSON file')
+    parser.add_argument('--errors-csv', help='Save failed images with stage and traceback to CSV file')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and process new or changed images in the input directory')
+    parser.add_argument('--settle-time', type=float, default=0.25,
+                        help='Seconds a file must stay unchanged before it is processed in watch mode')
+    parser.add_argument('--poll', action='store_true', help='Scan the input directory instead of using inotify')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print progress')
+    args = parser.parse_args(argv)
+    try:
+        check_renditions(args.rendition or [])
+    except ValueError as err:
+        parser.error(str(err))
+    return args
+
+
+def collect_settings(args):
+    """
+    Merge configuration with command line arguments
+    :param args: argparse.Namespace
+    :return: Configuration dict
+    """
+    settings = Configuration().snapshot()
+    if args.input:
+        settings['input_directory'] = args.input
+    if args.output:
+        settings['output_directory'] = args.output
+    if args.workers:
+        settings['worker_limit'] = args.workers
+    if args.engine:
+        settings['worker_engine'] = args.engine
+    for key in ('readers', 'writers', 'prefetch'):
+        if getattr(args, key) is not None:
+            settings['pipeline'] = {**settings['pipeline'], key: getattr(args, key)}
+    if args.recursive:
+        settings['recursive_input'] = True
+    if args.no_dedup or args.similar:
+        settings['duplicates'] = {**settings['duplicates'], 'detect': not args.no_dedup, 'similar': args.similar}
+    if args.memory_budget is not None:
+        settings['memory_budget_mb'] = args.memory_budget
+    if args.no_retry:
+        settings['retry_truncated'] = False
+    encoder = settings['encoder']
+    if args.format:
+        encoder['format'] = args.format
+    if args.progressive:
+        encoder['jpeg'] = {**encoder['jpeg'], 'progressive': True}
+    if args.png_compress_level is not None:
+        encoder['png'] = {**encoder['png'], 'compress_level': args.png_compress_level}
+    if args.webp_method is not None:
+        encoder['webp'] = {**encoder['webp'], 'method': args.webp_method}
+    if args.lossless:
+        encoder['webp'] = {**encoder['webp'], 'lossless': True}
+    if args.max_megapixels is not None:
+        settings['max_image_megapixels'] = args.max_megapixels
+    if args.strip_memory is not None:
+        settings['strip_memory_mb'] = args.strip_memory
+    image_settings = dict(settings['output_image_settings'])
+    for key in ('width', 'height', 'quality', 'max_size_kb'):
+        if getattr(args, key) is not None:
+            image_settings[key] = getattr(args, key)
+    if args.rendition:
+        image_settings['renditions'] = args.rendition
+    settings['output_image_settings'] = image_settings
+    return settings
+
+
+def progress_printer(runner):
+    def print_progress(done, total):
+        stats = runner.scheduler.stats()
+        print(f"\r{done}/{total}, queued {stats['queue_depth']}, in flight {stats['in_flight']} images "
+              f"{stats['in_flight_bytes'] / 2 ** 20:.0f} MB ", end='' if done < total else '\n', file=sys.stderr,
+              flush=True)
+    return print_progress
+
+
+def cancel_on_interrupt(control):
+    # First Ctrl+C lets images in work finish, the second one stops at once
+    def handler(signum, frame):
+        if control.cancelled:
+            raise KeyboardInterrupt
+        control.cancel()
+        print('\nCancelling, images in work are finished, press Ctrl+C again to stop at once',
+              file=sys.stderr, flush=True)
+    return handler
+
+
+def print_profile(summary):
+    print(f"{'stage':<12}{'count':>7}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for name, stats in summary.items():
+        if name == 'peak_bytes':
+            continue
+        print(f"{name:<12}{stats['count']:>7}{stats['total']:>10.2f}{stats['mean'] * 1000:>10.1f}"
+              f"{stats['p50'] * 1000:>10.1f}{stats['p90'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}")
+    if 'peak_bytes' in summary:
+        peak = summary['peak_bytes']
+        print(f"peak image memory: p50 {peak['p50'] / 2 ** 20:.1f} MB, max {peak['max'] / 2 ** 20:.1f} MB")
+
+
+def print_errors(report):
+    for record in report.error_records():
+        stage = f" in {record['stage']}" if record['stage'] else ''
+        print(f"{record['image_name']}: {record['exception']}{stage}: {record['message']}", file=sys.stderr)
+
+
+def watch(args, settings, runner):
+    """
+    Process images dropped into the input directory until interrupted
+    """
+    watcher = FolderWatcher(settings['input_directory'], settings['input_formats'],
+                            settle_time=args.settle_time, use_inotify=not args.poll,
+                            recursive=settings['recursive_input'])
+
+    def print_batch(report):
+        print_errors(report)
+        summary = report.summary()
+        print(f"{watcher.backend}: processed {summary['images']} images ({summary['errors']} errors, "
+              f"{summary['skipped']} up to date) in {summary['wall_time']} s", flush=True)
+
+    print(f"Watching {settings['input_directory']}, press Ctrl+C to stop", file=sys.stderr, flush=True)
+    try:
+        watch_folder(runner, watcher, threading.Event(), on_report=print_batch)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = collect_settings(args)
+    options = editor_options(
+        settings,
+        no_rewrite=args.no_rewrite,
+        opaque=args.opaque,
+        ignore_image_metadata=args.ignore_image_metadata,
+        simple_formats=not args.preserve_formats,
+        profile_stages=bool(args.profile or args.profile_json or args.profile_csv))
+
+    use_cache = settings['result_cache'] and not args.no_cache
+    control = BatchControl()
+    # Watched batches are not journaled, each of them is short
+    use_journal = settings['resume_batches'] and not args.no_resume and not args.watch
+    runner = BatchRunner(settings, options, use_cache, control, use_journal)
+    if args.watch:
+        # Existing images are processed first, up to date ones are skipped with cache
+        return watch(args, settings, runner)
+
+    images_to_work = list_images(settings['input_directory'], settings['input_formats'], settings['recursive_input'])
+    if not images_to_work:
+        print('No files in input!', file=sys.stderr)
+        return 1
+
+    previous_handler = signal.signal(signal.SIGINT, cancel_on_interrupt(control))
+    try:
+        report = runner.run(images_to_work, progress=None if args.quiet else progress_printer(runner))
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+    print_errors(report)
+    summary = report.summary()
+    print(f"Processed {summary['images']} images ({summary['errors']} errors, {summary['skipped']} up to date, "
+          f"{summary['duplicates']} duplicates linked) in {summary['wall_time']} s")
+    if summary['cancelled']:
+        print(f"Cancelled, {summary['cancelled']} images were not processed")
+    if summary['resumed']:
+        print(f"Resumed stopped batch, {summary['resumed']} images were done before")
+    if summary['recovered']:
+        print(f"Recovered {summary['recovered']} damaged images with truncated loading")
+    print(f"Throughput: {summary['images_per_second']} images/s, {summary['input_mb_per_second']} MB/s "
+          f"({summary['input_mb']} MB in, {summary['output_mb']} MB out, "
+          f"peak {summary['peak_in_flight_mb']} MB estimated in flight)")
+    for result in report.results:
+        for path in result.get('oversized', ()):
+            print(f'{path}: larger than maximum size', file=sys.stderr)
+    for suffix, stats in report.encoding_summary().items():
+        print(f"Encoded {stats['files']} {suffix} files, {stats['output_mb']} MB in {stats['seconds']} s "
+              f"({stats['ms_per_file']} ms per file)")
+    if args.profile:
+        print_profile(report.profile_summary())
+    if args.profile_json:
+        profiler.dump_json(report.results, args.profile_json)
+    if args.profile_csv:
+        profiler.dump_csv(report.results, args.profile_csv)
+    if args.errors_json:
+        errors.dump_json(report.error_records(), args.errors_json)
+    if args.errors_csv:
+        errors.dump_csv(report.error_records(), args.errors_csv)
+    if args.duplicates_report:
+        with open(args.duplicates_report, 'w') as report_file:
+            json.dump(report.duplicates, report_file, indent=2)
+    return 1 if report.errors or report.cancelled else 0
@@ -1,31 +1,133 @@
+import copy
 import json
 import os
+import threading
+import time
+from typing import List, TypedDict
+
+RENDITION_KEYS = ('quality', 'max_size_kb', 'format', 'suffix', 'subfolder')
+INTEGER_RENDITION_KEYS = ('quality', 'max_size_kb')
+
+
+def parse_rendition(text: str):
+    """
+    Parse rendition from 'WIDTHxHEIGHT[:key=value...]' text,
+    for ex. '600x600:quality=80:format=.jpg:subfolder=600'
+    :param text: Rendition text
+    :return: Rendition dict
+    """
+    size, *options = text.split(':')
+    try:
+        width, height = size.lower().split('x')
+        rendition = {'width': int(width), 'height': int(height)}
+    except ValueError:
+        raise ValueError(f'Rendition size must be WIDTHxHEIGHT, not {size!r} in {text!r}') from None
+    for option in options:
+        if '=' not in option:
+            raise ValueError(f'Rendition option must be key=value, not {option!r} in {text!r}')
+        key, value = option.split('=', 1)
+        if key not in RENDITION_KEYS:
+            raise ValueError(f'Unknown rendition option {key!r} in {text!r}')
+        try:
+            rendition[key] = int(value) if key in INTEGER_RENDITION_KEYS else value
+        except ValueError:
+            raise ValueError(f'Rendition option {key!r} must be a number in {text!r}') from None
+    return rendition
+
+
+def check_renditions(renditions: list):
+    """
+    Raise ValueError if two renditions would be saved to the same output files,
+    they need a different subfolder, suffix or format
+    """
+    outputs = {}
+    for rendition in renditions:
+        output = tuple(rendition.get(key) or '' for key in ('subfolder', 'suffix', 'format'))
+        if output in outputs:
+            raise ValueError(f'Renditions {format_rendition(outputs[output])!r} and {format_rendition(rendition)!r} '
+                             f'have the same output files, give them a different subfolder, suffix or format')
+        outputs[output] = rendition
+
+
+def format_rendition(rendition: dict):
+    """
+    Rendition dict to text, reverse of parse_rendition()
+    """
+    options = [f'{key}={rendition[key]}' for key in RENDITION_KEYS if rendition.get(key)]
+    return ':'.join([f"{rendition['width']}x{rendition['height']}"] + options)
+
+
+class Color(TypedDict):
+    red: int
+    green: int
+    blue: int
+
+
+class ColorLimits(Color):
+    alpha: int
+
+
+class OutputImageSettings(TypedDict):
+    width: int
+    height: int
+    quality: int
+    max_size_kb: int
+    color_limits: ColorLimits
+    renditions: List[dict]
+
+
+class AdvancedSettings(TypedDict):
+    crop: bool
+    square: bool
+    fit: bool
+    fast_decode: bool
+    square_fill_color: Color
+    opaque_fill_color: Color
 
 
 class Configuration:
-    USER_DOCUMENTS_FOLDER = f'{os.getenv("USERPROFILE")}\Documents'
-    APP_CONFIG_FOLDER = f'{os.getenv("APPDATA")}\ImageEditor'
-    APP_CONFIG_FILE = f'{APP_CONFIG_FOLDER}\config.json'
+    """
+    Application configuration, one object per process.
+    Configuration() always returns the same object, config.json is read on first use
+    and read again only when its modification time has changed.
+    Callbacks added with subscribe() receive the new config dict after save() or reload.
+    """
+    # USERPROFILE and APPDATA on Windows, home folder and XDG config folder elsewhere
+    USER_DOCUMENTS_FOLDER = os.path.join(os.getenv('USERPROFILE') or os.path.expanduser('~'), 'Documents')
+    APP_CONFIG_FOLDER = os.path.join(
+        os.getenv('APPDATA') or os.getenv('XDG_CONFIG_HOME') or os.path.expanduser(os.path.join('~', '.config')),
+        'ImageEditor')
+    APP_CONFIG_FILE = os.path.join(APP_CONFIG_FOLDER, 'config.json')
+    # Config file modification time is checked not more often than this, seconds
+    RELOAD_INTERVAL = 1.0
     DEFAULT_CONFIG = {
-        'config_version': 36,
-        'input_directory': f'{USER_DOCUMENTS_FOLDER}\ImageEditor\input',
-        'output_directory': f'{USER_DOCUMENTS_FOLDER}\ImageEditor\output',
+        'config_version': 52,
+        'input_directory': os.path.join(USER_DOCUMENTS_FOLDER, 'ImageEditor', 'input'),
+        'output_directory': os.path.join(USER_DOCUMENTS_FOLDER, 'ImageEditor', 'output'),
         'output_image_settings': {
             'width': 1000,
             'height': 1000,
             'quality': 75,
+            # Quality is lowered until JPEG or WebP output fits in this size, 0 for no limit
+            'max_size_kb': 0,
             'color_limits': {
                 'red': 252,
                 'green': 252,
                 'blue': 252,
                 'alpha': 10
-            }
+            },
+            # Extra output sizes from one decode, see parse_rendition()
+            'renditions': []
         },
         'input_formats': ['.jpg', '.jpeg', '.png', '.webp', '.jfif', '.gif', '.tiff'],
+        # Include images from subfolders of input directory, output keeps the folder structure
+        'recursive_input': False,
         'advanced_settings': {
             'crop': True,
             'square': True,
             'fit': True,
+            # Decode large JPEGs at reduced scale and pre-shrink other formats with reduce()
+            'fast_decode': True,
             'square_fill_color': {
                 'red': 255,
                 'green': 255,
@@ -37,14 +139,125 @@ class Configuration:
                 'blue': 255
             },
         },
+        # Output encoding, sections are Image.save options of the format
+        'encoder': {
+            # 'auto' for JPEG, or PNG for images with transparency, '.webp' for all images, see OUTPUT_FORMATS
+            'format': 'auto',
+            # Progressive JPEG is about 2 times slower to encode, but shows up sooner on web pages
+            'jpeg': {'optimize': True, 'progressive': False, 'subsampling': '4:2:0'},
+            # 1 is the fastest with the largest files, 9 is the slowest
+            'png': {'compress_level': 6},
+            # Quality of WebP is taken from rendition, method 0 is the fastest, 6 makes the smallest files
+            'webp': {'method': 4, 'lossless': False}
+        },
         'worker_limit': 4,
-        'verbose_errors': False
+        # 'thread', 'process' or 'pipeline', process pool scales across CPU cores,
+        # pipeline overlaps file reading and saving with processing
+        'worker_engine': 'thread',
+        # Threads of pipeline stages, processing stage uses worker_limit
+        'pipeline': {
+            'readers': 2,
+            'writers': 2,
+            # Maximum input files read ahead of processing
+            'prefetch': 8
+        },
+        # Images are admitted to workers while their estimated memory fits, 0 for no limit
+        'memory_budget_mb': 4096,
+        # Larger PNG and uncompressed TIFF images are cropped and reduced
+        # strip by strip within this memory, 0 to always decode whole image
+        'strip_memory_mb': 256,
+        # Larger images are rejected before decoding as possible decompression bombs, 0 for PIL default limit
+        'max_image_megapixels': 1000,
+        # Images which fail to decode as damaged are processed again with truncated loading
+        'retry_truncated': True,
+        # Skip images with up to date output on 'start'
+        'result_cache': True,
+        # Record 'start' batches in a journal, so the stopped batch continues where it stopped
+        'resume_batches': True,
+        # Equal input files are processed once and their outputs are linked,
+        # similar also compares downscaled images to find the same photo saved again
+        'duplicates': {
+            'detect': True,
+            'similar': False,
+            # False to copy output files instead of hard linking
+            'hardlink': True
+        },
+        # 'trash' sends files to system trash, 'rename' moves the whole directory to trash_directory at once
+        'clear_mode': 'trash',
+        'trash_directory': os.path.join(USER_DOCUMENTS_FOLDER, 'ImageEditor', 'trash'),
+        'verbose_errors': False,
+        # Thumbnails in the input file list
+        'show_previews': True
     }
 
-    def __init__(self):
-        self.config = self._load_or_create()
-        self._check_or_create_path(self.config['input_directory'])
-        self._check_or_create_path(self.config['output_directory'])
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._config = None
+                instance._mtime_ns = None
+                instance._checked = 0.0
+                instance._callbacks = []
+                instance._lock = threading.RLock()
+                cls._instance = instance
+        return cls._instance
+
+    @property
+    def config(self):
+        """
+        Current config dict, loaded on first access and reloaded if config.json was changed
+        """
+        with self._lock:
+            if self._config is None or time.monotonic() - self._checked > self.RELOAD_INTERVAL:
+                self._checked = time.monotonic()
+                if self._config is None or self._file_mtime() != self._mtime_ns:
+                    first_load = self._config is None
+                    self._config = self._load_or_create()
+                    self._mtime_ns = self._file_mtime()
+                    self._check_or_create_path(self._config['input_directory'])
+                    self._check_or_create_path(self._config['output_directory'])
+                    if not first_load:
+                        self._notify()
+            return self._config
+
+    @property
+    def output_image_settings(self) -> OutputImageSettings:
+        return self.config['output_image_settings']
+
+    @property
+    def advanced_settings(self) -> AdvancedSettings:
+        return self.config['advanced_settings']
+
+    @property
+    def input_directory(self) -> str:
+        return self.config['input_directory']
+
+    @property
+    def output_directory(self) -> str:
+        return self.config['output_directory']
+
+    def snapshot(self):
+        """
+        Copy of current config dict, so a batch is not affected by changes made while it runs
+        """
+        with self._lock:
+            return copy.deepcopy(self.config)
+
+    def subscribe(self, callback):
+        """
+        Call callback with config dict when configuration changes
+        :param callback: Callable, may be called from any thread
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
 
     def update(self, key, value):
         """
@@ -60,8 +273,27 @@ class Configuration:
         """
         Saving current configuration to APP_CONFIG_FILE
         """
-        with open(self.APP_CONFIG_FILE, 'w') as config_file:
-            json.dump(self.config, config_file)
+        with self._lock:
+            config = self.config
+            # Other processes never read half written file
+            temporary_file = f'{self.APP_CONFIG_FILE}.tmp'
+            with open(temporary_file, 'w') as config_file:
+                json.dump(config, config_file)
+            os.replace(temporary_file, self.APP_CONFIG_FILE)
+            self._mtime_ns = self._file_mtime()
+            self._check_or_create_path(config['input_directory'])
+            self._check_or_create_path(config['output_directory'])
+            self._notify()
+
+    def _notify(self):
+        for callback in list(self._callbacks):
+            callback(self._config)
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.APP_CONFIG_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return None
 
     def _load_or_create(self):
         """
@@ -77,7 +309,7 @@ class Configuration:
         if config['config_version'] < self.DEFAULT_CONFIG['config_version']:
             with open(self.APP_CONFIG_FILE, 'w+') as config_file:
                 json.dump(self.DEFAULT_CONFIG, config_file)
-            config = self.DEFAULT_CONFIG
+            config = copy.deepcopy(self.DEFAULT_CONFIG)
         return config
 
     @staticmethod
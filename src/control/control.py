@@ -0,0 +1,57 @@
+import threading
+
+
+class Cancelled(Exception):
+    """
+    Raised at a stage boundary of an image when its batch was cancelled
+    """
+
+
+class BatchControl:
+    """
+    Cancel, pause and resume of a running batch, shared by BatchRunner and its worker threads.
+    Queued images are not admitted while the batch is paused and are dropped when it is cancelled.
+    Images in work call checkpoint() between their stages, paused ones wait there and cancelled
+    ones raise Cancelled. Images in process pool workers can not see the control and finish.
+    """
+
+    def __init__(self):
+        # Set while the batch is allowed to run
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Paused jobs wake up to see cancellation
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait(self, timeout=None):
+        """
+        Block while the batch is paused
+        :return: False if still paused after timeout
+        """
+        return self._running.wait(timeout)
+
+    def checkpoint(self):
+        """
+        Stage boundary of an image: wait while paused, raise Cancelled if cancelled
+        """
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise Cancelled('batch was cancelled')
@@ -0,0 +1,181 @@
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from src.cache.cache import file_hash
+from src.encoder.encoder import choose_format, temporary_path
+from src.image_editor.image_editor import ImageEditor
+from src.loader.loader import ImageLoader
+
+# Similar images differ by at most this many bits of 64 bit difference hash
+MAX_HASH_DISTANCE = 3
+# and by this mean channel difference of 16x16 RGBA thumbnails, 0-255
+MAX_THUMBNAIL_DIFFERENCE = 2.0
+# Hash is split into chunks, similar hashes have at least one equal chunk
+HASH_CHUNKS = MAX_HASH_DISTANCE + 1
+
+
+def image_signature(path: str):
+    """
+    Perceptual signature of the image from a downscaled decode
+    :return: Tuple of (bands, size, difference hash, 16x16 RGBA thumbnail bytes)
+    """
+    with ImageLoader().open(path) as image:
+        bands = image.getbands()
+        size = image.size
+        image.draft(image.mode, (64, 64))
+        base = image.convert('RGBA').resize((64, 64), Image.BOX, reducing_gap=2.0)
+    gray = list(base.convert('L').resize((9, 8), Image.BOX).getdata())
+    difference_hash = 0
+    for row in range(8):
+        for column in range(8):
+            difference_hash = difference_hash << 1 | (gray[row * 9 + column] > gray[row * 9 + column + 1])
+    return bands, size, difference_hash, base.resize((16, 16), Image.BOX).tobytes()
+
+
+def _similar(first, second):
+    (first_width, first_height), (second_width, second_height) = first[1], second[1]
+    if abs(first_width * second_height - second_width * first_height) > 0.01 * first_height * second_height:
+        return False
+    if bin(first[2] ^ second[2]).count('1') > MAX_HASH_DISTANCE:
+        return False
+    difference = sum(abs(a - b) for a, b in zip(first[3], second[3]))
+    return difference / len(first[3]) <= MAX_THUMBNAIL_DIFFERENCE
+
+
+def find_duplicates(directory: str, image_names: list, similar=False, simple_formats=True, opaque=False, workers=4,
+                    output_format='auto', control=None):
+    """
+    Group images with equal content. Files are equal by content hash, only files of equal size are hashed.
+    With similar option images are also compared by perceptual signature, so the same photo
+    saved again in another format or quality is found too. It decodes every image once.
+    :param directory: Input directory
+    :param image_names: Image file names in directory
+    :param similar: True to compare perceptual signatures
+    :param simple_formats: ImageEditor option, images are grouped only if output format is the same
+    :param opaque: ImageEditor option
+    :param workers: Threads for hashing and decoding
+    :param output_format: Encoder option, see choose_format()
+    :param control: BatchControl, checked before each file is hashed or decoded
+    :return: Dict of first image name: list of its duplicates names
+    """
+    def checked(function):
+        def call(image_name):
+            if control:
+                control.checkpoint()
+            return function(os.path.join(directory, image_name))
+        return call
+
+    parent = {image_name: image_name for image_name in image_names}
+
+    def find(image_name):
+        while parent[image_name] != image_name:
+            parent[image_name] = parent[parent[image_name]]
+            image_name = parent[image_name]
+        return image_name
+
+    def union(first, second):
+        first, second = find(first), find(second)
+        if first != second:
+            parent[max(first, second)] = min(first, second)
+
+    # Equal files, suffix matters only if output keeps the input format
+    by_size = defaultdict(list)
+    for image_name in image_names:
+        suffix = '' if simple_formats else Path(image_name).suffix.lower()
+        by_size[os.path.getsize(os.path.join(directory, image_name)), suffix].append(image_name)
+    candidates = [image_name for names in by_size.values() if len(names) > 1 for image_name in names]
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        hashes = dict(zip(candidates, pool.map(checked(file_hash), candidates)))
+        by_hash = {}
+        for image_name in candidates:
+            key = hashes[image_name], '' if simple_formats else Path(image_name).suffix.lower()
+            if key in by_hash:
+                union(by_hash[key], image_name)
+            else:
+                by_hash[key] = image_name
+
+        if similar:
+            names = sorted({find(image_name) for image_name in image_names})
+            signatures = {}
+            for image_name, signature in zip(names, pool.map(checked(_try_signature), names)):
+                if signature:
+                    signatures[image_name] = signature
+            buckets = defaultdict(list)
+            for image_name, signature in signatures.items():
+                # Only images with the same output format can share encoded output
+                format_key = choose_format(image_name, signature[0], simple_formats, opaque, output_format).lower()
+                for chunk in range(HASH_CHUNKS):
+                    bucket = format_key, chunk, signature[2] >> (chunk * 64 // HASH_CHUNKS) & (
+                        2 ** (64 // HASH_CHUNKS) - 1)
+                    for other in buckets[bucket]:
+                        if find(other) != find(image_name) and _similar(signatures[other], signature):
+                            union(other, image_name)
+                    buckets[bucket].append(image_name)
+
+    groups = defaultdict(list)
+    for image_name in sorted(image_names):
+        primary = find(image_name)
+        if primary != image_name:
+            groups[primary].append(image_name)
+    return dict(groups)
+
+
+def _try_signature(path: str):
+    # Broken images are left for usual processing and its error handling
+    try:
+        return image_signature(path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def link_outputs(result: dict, image_name: str, input_directory: str, output_directory: str, image_settings: dict,
+                 no_rewrite=False, hardlink=True):
+    """
+    Create outputs of duplicate image from outputs of its first image
+    :param result: Result record of the first image, see EditorManager.result()
+    :param image_name: Duplicate image file name
+    :param hardlink: True to link output files, they are copied if linking is not possible
+    :return: Result record of the duplicate
+    """
+    renditions = ImageEditor.get_renditions(image_settings)
+    output_paths = ImageEditor.get_output_paths(image_name, output_directory, renditions, result['output_format'])
+    for index, (source, output_path) in enumerate(zip(result['output_paths'], output_paths)):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if no_rewrite:
+            output_path = output_paths[index] = ImageEditor._get_safe_path(output_path)
+        _link_or_copy(source, output_path, hardlink)
+    return {
+        'image_name': image_name,
+        'output_path': output_paths[0],
+        'output_paths': output_paths,
+        'output_format': result['output_format'],
+        'input_size': os.path.getsize(os.path.join(input_directory, image_name)),
+        'output_size': sum(os.path.getsize(path) for path in output_paths),
+        'profile': {},
+        'duplicate_of': result['image_name']
+    }
+
+
+def _link_or_copy(source: str, destination: str, hardlink=True):
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        # Already linked by a previous run, replacing a name of the same file does nothing
+        return
+    # Replace existing output at once, readers never see it missing
+    temporary = temporary_path(destination)
+    try:
+        if hardlink:
+            try:
+                os.link(source, temporary)
+            except OSError:
+                shutil.copyfile(source, temporary)
+        else:
+            shutil.copyfile(source, temporary)
+        os.replace(temporary, destination)
+    finally:
+        if os.path.lexists(temporary):
+            os.remove(temporary)
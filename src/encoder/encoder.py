@@ -0,0 +1,141 @@
+import os
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+# 'auto' saves JPEG, or PNG for images with transparency, other formats are used for all images
+OUTPUT_FORMATS = ('auto', '.webp')
+# Sections of encoder settings by PIL format name, PNG compression does not use quality
+ENCODER_SECTIONS = {'JPEG': 'jpeg', 'PNG': 'png', 'WEBP': 'webp'}
+QUALITY_FORMATS = ('JPEG', 'WEBP')
+# Quality search for maximum file size does not go below this quality,
+# and encodes the image at most this many times. It stops earlier when output
+# is smaller than maximum size by less than SIZE_TOLERANCE of it.
+MIN_QUALITY = 10
+MAX_QUALITY_TRIALS = 6
+SIZE_TOLERANCE = 0.05
+
+
+def choose_format(image_name: str, bands, simple_formats=True, opaque=False, output_format='auto'):
+    """
+    Output file suffix of the image
+    :param bands: Bands of decoded image, for ex. ('R', 'G', 'B', 'A')
+    :param simple_formats: False to keep input format
+    :param opaque: True if alpha channel is removed
+    :param output_format: One of OUTPUT_FORMATS
+    :return: Suffix, for ex. '.jpg'
+    """
+    if not simple_formats:
+        return Path(image_name).suffix
+    if output_format and output_format != 'auto':
+        return output_format
+    if any(band in bands for band in ('a', 'A', 'P')) and not opaque:
+        return '.png'
+    return '.jpg'
+
+
+def save_options(path: str, quality: int, encoder=None):
+    """
+    Keyword arguments of Image.save for output file
+    :param path: Output file path, format is chosen by its suffix
+    :param quality: Rendition quality
+    :param encoder: 'encoder' configuration dict, None for PIL defaults
+    :return: Dict of save options
+    """
+    image_format = _image_format(path)
+    options = {} if image_format == 'PNG' else {'quality': quality}
+    if encoder and image_format in ENCODER_SECTIONS:
+        options.update(encoder.get(ENCODER_SECTIONS[image_format], {}))
+    return options
+
+
+def save_image(image: Image, path: str, quality: int, encoder=None):
+    """
+    Encode image to the output file atomically, format is chosen by its suffix
+    :param quality: Rendition quality
+    :param encoder: 'encoder' configuration dict
+    """
+    with atomic_output(path) as output_file:
+        image.save(output_file, _image_format(path), **save_options(path, quality, encoder))
+
+
+def temporary_path(path: str):
+    """
+    Path of a temporary file next to path, unique for the process and thread writing it
+    """
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+@contextmanager
+def atomic_output(path: str):
+    """
+    Binary file object which replaces the file at path only when it is written completely,
+    so stopped batch never leaves partly written outputs
+    """
+    # Temporary file is unique per writer, images of different formats can have the same output path
+    temporary = temporary_path(path)
+    try:
+        with open(temporary, 'wb') as output_file:
+            yield output_file
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def encode_to_size(image: Image, path: str, quality: int, max_bytes: int, encoder=None):
+    """
+    Encode image in memory with the highest quality up to rendition quality which fits in max_bytes.
+    After rendition quality MIN_QUALITY is tried, then quality is searched between the largest fitting
+    and the smallest too large trial, next trial is interpolated by file size.
+    Formats without quality are encoded once.
+    :param image: Processed Image object
+    :param path: Output file path, format is chosen by its suffix
+    :param quality: Rendition quality, the highest quality tried
+    :param max_bytes: Maximum file size
+    :param encoder: 'encoder' configuration dict
+    :return: Tuple (encoded bytes, quality, True if they fit in max_bytes), the smallest trial if nothing fits
+    """
+    image_format = _image_format(path)
+
+    def encode(trial_quality):
+        buffer = BytesIO()
+        image.save(buffer, image_format, **save_options(path, trial_quality, encoder))
+        return buffer.getvalue()
+
+    data = encode(quality)
+    if len(data) <= max_bytes or image_format not in QUALITY_FORMATS:
+        return data, quality, len(data) <= max_bytes
+    fitting = encode(MIN_QUALITY), MIN_QUALITY
+    if len(fitting[0]) > max_bytes or quality <= MIN_QUALITY:
+        return fitting[0], fitting[1], len(fitting[0]) <= max_bytes
+    # Untried qualities between the trials, sizes of the trials around them
+    low, high = MIN_QUALITY + 1, quality - 1
+    low_size, high_size = len(fitting[0]), len(data)
+    for _ in range(MAX_QUALITY_TRIALS - 2):
+        if low > high or low_size >= max_bytes * (1 - SIZE_TOLERANCE):
+            break
+        # File size grows with quality almost linearly over a short range, the trial
+        # is kept off the range ends, so the range shrinks by a quarter at least
+        trial_quality = low - 1 + int((max_bytes - low_size) * (high + 1 - (low - 1)) / (high_size - low_size))
+        trial_quality = min(max(trial_quality, low + (high - low) // 4), high - (high - low) // 4)
+        data = encode(trial_quality)
+        if len(data) <= max_bytes:
+            fitting = data, trial_quality
+            low, low_size = trial_quality + 1, len(data)
+        else:
+            high, high_size = trial_quality - 1, len(data)
+    return fitting[0], fitting[1], True
+
+
+def _image_format(path: str):
+    # PIL format name by file suffix, plugins of less common formats
+    # like WebP are registered only by Image.init()
+    extension = Path(path).suffix.lower()
+    if extension not in Image.EXTENSION:
+        Image.init()
+    return Image.EXTENSION.get(extension)
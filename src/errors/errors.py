@@ -0,0 +1,75 @@
+import csv
+import json
+import traceback
+
+from PIL import UnidentifiedImageError
+
+# Stages which decode pixels, damaged files fail in them and can be loaded again with truncated loading
+DECODE_STAGES = ('decode', 'draft', 'crop_box')
+ERROR_FIELDS = ('image_name', 'stage', 'exception', 'message', 'traceback')
+
+
+def mark_stage(err: BaseException, name: str):
+    """
+    Remember the innermost processing stage of the exception, it is kept when the exception
+    is pickled from a process pool worker
+    """
+    if getattr(err, 'stage', None) is None:
+        try:
+            err.stage = name
+        except AttributeError:
+            pass
+
+
+def is_damaged(err: BaseException):
+    """
+    True if the error looks like a truncated or corrupt image file, not like a missing or unknown one
+    """
+    if getattr(err, 'stage', None) not in DECODE_STAGES or isinstance(err, UnidentifiedImageError):
+        return False
+    if isinstance(err, OSError):
+        # Errors of the file system have errno, errors of decoders do not
+        return err.errno is None
+    return isinstance(err, SyntaxError)
+
+
+def error_record(image_name: str, err: BaseException):
+    """
+    Report record of a failed image
+    :return: Dict with ERROR_FIELDS, traceback of process pool worker is included as the cause
+    """
+    return {
+        'image_name': image_name,
+        'stage': getattr(err, 'stage', None) or '',
+        'exception': type(err).__name__,
+        'message': str(err),
+        'traceback': ''.join(traceback.format_exception(type(err), err, err.__traceback__))
+    }
+
+
+def dump_json(records: list, path: str):
+    """
+    Save error records to JSON file
+    """
+    with open(path, 'w') as json_file:
+        json.dump(records, json_file, indent=2)
+
+
+def dump_csv(records: list, path: str):
+    """
+    Save error records to CSV file, one row per failed image
+    """
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, ERROR_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def dump(records: list, path: str):
+    """
+    Save error records to JSON or CSV file by its suffix
+    """
+    if path.lower().endswith('.json'):
+        dump_json(records, path)
+    else:
+        dump_csv(records, path)
@@ -1,54 +1,255 @@
+import math
+import os
+import time
+from fractions import Fraction
+from io import BytesIO
 from pathlib import Path
 
-import numpy
-from PIL import Image, ImageOps, ImageFile
+from PIL import Image, UnidentifiedImageError
+
+from src.encoder.encoder import atomic_output, choose_format, encode_to_size, save_image
+from src.errors.errors import mark_stage
+from src.image_editor.strips import STRIP_BYTES_PER_PIXEL, open_strip_reader
+from src.image_editor.trim import Trimmer
+from src.loader.loader import ImageLoader
+from src.profiler.profiler import ImageProfile, NullProfile, image_memory
+
+# Actual image is decoded or pre-shrunk to at least this many times the output size
+# before the final LANCZOS resize, same default as Image.thumbnail uses.
+REDUCING_GAP = 2.0
+
+
+class GeometryPlan:
+    """
+    Final geometry of processed image, computed from crop box and target size before
+    any pixel is touched. Squaring and fitting are described as a window over the canvas,
+    so actual image can be resized first and then pasted at output resolution.
+    :param crop_box: Tuple (left, upper, right, lower) of actual image in source image
+    :param square: True if actual image should be placed on a square canvas
+    :param size: Tuple (width, height) of output image, None to keep canvas size
+    """
+
+    def __init__(self, crop_box, square=True, size=None):
+        left, upper, right, lower = crop_box
+        width, height = right - left, lower - upper
+        if square:
+            canvas_size = (max(width, height), max(width, height))
+        else:
+            canvas_size = (width, height)
+        # Position of actual image on the canvas, same as _make_square_image does
+        offset = (int((canvas_size[0] - width) / 2), int((canvas_size[1] - height) / 2))
+        window = self._fit_window(canvas_size, size) if size else (0, 0) + canvas_size
+
+        self.crop_box = crop_box
+        self.output_size = tuple(size) if size else canvas_size
+        self.scale = self.output_size[0] / (window[2] - window[0])
+
+        # Part of actual image visible through the window, in output coordinates
+        visible = (
+            max(window[0], offset[0]), max(window[1], offset[1]),
+            min(window[2], offset[0] + width), min(window[3], offset[1] + height))
+        self.paste_box = tuple(
+            round((visible[i] - window[i % 2]) * self.scale) for i in range(4))
+        # Same part in source image coordinates, aligned to whole output pixels
+        # and clamped to crop box against float rounding errors
+        source_box = [
+            crop_box[i % 2] - offset[i % 2] + window[i % 2] + self.paste_box[i] / self.scale for i in range(4)]
+        self.source_box = (
+            max(source_box[0], left), max(source_box[1], upper),
+            min(source_box[2], right), min(source_box[3], lower))
+
+    @property
+    def paste_size(self):
+        return self.paste_box[2] - self.paste_box[0], self.paste_box[3] - self.paste_box[1]
+
+    @staticmethod
+    def _fit_window(canvas_size, size):
+        """
+        Centered window over the canvas with output aspect ratio, as ImageOps.fit crops it
+        :return: Tuple (left, upper, right, lower)
+        """
+        canvas_ratio = canvas_size[0] / canvas_size[1]
+        output_ratio = size[0] / size[1]
+        if canvas_ratio == output_ratio:
+            window_size = canvas_size
+        elif canvas_ratio > output_ratio:
+            window_size = (output_ratio * canvas_size[1], canvas_size[1])
+        else:
+            window_size = (canvas_size[0], canvas_size[0] / output_ratio)
+        left = (canvas_size[0] - window_size[0]) / 2
+        upper = (canvas_size[1] - window_size[1]) / 2
+        return left, upper, left + window_size[0], upper + window_size[1]
 
 
 class ImageProcessor:
+    # Stage timings are recorded only when ImageProfile is set
+    profile = NullProfile()
+    # Decoder options of the job
+    loader = ImageLoader()
+
     def process_image(self, image: Image, image_settings: dict, crop=True, square=True, opaque=True, fit=True,
                       **kwargs):
-        # Flag for ignoring metadata of image, for ex. when it is
-        # too large and cause PIL to raise exception
-        ImageFile.LOAD_TRUNCATED_IMAGES = kwargs.get(
-            'ignore_image_metadata', False)
+        """
+        Process image to output of image_settings width and height, renditions are ignored
+        :return: Image object
+        """
+        image_settings = {key: value for key, value in image_settings.items() if key != 'renditions'}
+        return self.process_renditions(image, image_settings, crop, square, opaque, fit, **kwargs)[0]
+
+    def process_renditions(self, image: Image, image_settings: dict, crop=True, square=True, opaque=True, fit=True,
+                           **kwargs):
+        """
+        Process image to every rendition of image_settings. Image is decoded and cropped once,
+        then rendered at the largest needed resolution and every rendition is fitted from it.
+        :return: List of Image objects in order of get_renditions(image_settings)
+        """
+        with self.profile.stage('decode'):
+            self.loader.load(image)
+            self.profile.allocated(image)
 
         has_transparency = any(a in image.getbands() for a in ('a', 'A', 'P'))
+
+        crop_box = None
+        if crop:
+            with self.profile.stage('crop_box'):
+                crop_box = self._get_crop_box(image, self._get_color_limits(image_settings))
+        # Whole image is kept if there is nothing to crop
+        crop_box = crop_box or (0, 0) + image.size
+
+        square_fill_color = self._get_fill_color(kwargs.get('square_fill_color'))
+        opaque_fill_color = self._get_fill_color(kwargs.get('opaque_fill_color'))
+        reducing_gap = REDUCING_GAP if kwargs.get('fast_decode') else None
+
+        renditions = self.get_renditions(image_settings)
+        if not fit:
+            # Every rendition is the same canvas
+            output_image = self._render(image, GeometryPlan(crop_box, square), has_transparency, opaque,
+                                        square_fill_color, opaque_fill_color, reducing_gap)
+            return [output_image] * len(renditions)
+        if len(renditions) == 1:
+            plan = GeometryPlan(crop_box, square, (renditions[0]['width'], renditions[0]['height']))
+            return [self._render(image, plan, has_transparency, opaque, square_fill_color, opaque_fill_color,
+                                 reducing_gap)]
+
+        # Whole canvas at the largest scale any rendition needs
+        scale = max(GeometryPlan(crop_box, square, (rendition['width'], rendition['height'])).scale
+                    for rendition in renditions)
+        canvas_size = GeometryPlan(crop_box, square).output_size
+        size = (max(1, round(canvas_size[0] * scale)), max(1, round(canvas_size[1] * scale)))
+        intermediate = self._render(image, GeometryPlan(crop_box, square, size), has_transparency, opaque,
+                                    square_fill_color, opaque_fill_color, reducing_gap)
+        output_images = [None] * len(renditions)
+        # Cascade from large to small, each rendition is resized from the previous one
+        # with the same aspect ratio, as it covers the same part of the canvas
+        sources = {}
+        order = sorted(range(len(renditions)), reverse=True,
+                       key=lambda index: renditions[index]['width'] * renditions[index]['height'])
+        with self.profile.stage('renditions'):
+            for index in order:
+                size = (renditions[index]['width'], renditions[index]['height'])
+                source = sources.get(Fraction(*size), intermediate)
+                if source.size == size:
+                    output_image = source
+                else:
+                    output_image = source.resize(size, Image.LANCZOS, box=GeometryPlan._fit_window(source.size, size),
+                                                 reducing_gap=reducing_gap)
+                    self.profile.allocated(output_image)
+                sources[Fraction(*size)] = output_images[index] = output_image
+        return output_images
+
+    @staticmethod
+    def get_renditions(image_settings: dict):
+        """
+        Output renditions of image_settings with all keys filled.
+        Without 'renditions' list there is one rendition of image_settings width, height and quality.
+        :return: List of dicts with width, height, quality, max_size_kb, format, suffix and subfolder keys,
+        format None means format chosen by ImageEditor
+        """
+        default = {
+            'width': image_settings['width'],
+            'height': image_settings['height'],
+            'quality': image_settings.get('quality', 75),
+            'max_size_kb': image_settings.get('max_size_kb', 0),
+            'format': None,
+            'suffix': '',
+            'subfolder': ''
+        }
+        return [{**default, **rendition} for rendition in image_settings.get('renditions') or [{}]]
+
+    @staticmethod
+    def _get_color_limits(image_settings: dict):
         _color_limits = image_settings.get('color_limits')
         if _color_limits:
-            color_limits = (
-                _color_limits['red'], _color_limits['green'], _color_limits['blue'], _color_limits['alpha'])
-        else:
-            color_limits = (255, 255, 255, 0)
+            return _color_limits['red'], _color_limits['green'], _color_limits['blue'], _color_limits['alpha']
+        return 255, 255, 255, 0
 
-        im = image
+    @staticmethod
+    def _get_fill_color(fill_color: dict):
+        if fill_color:
+            return fill_color['red'], fill_color['green'], fill_color['blue']
+        return 255, 255, 255
 
-        if crop:
-            im = self._crop_to_actual_image(im, color_limits)
+    @staticmethod
+    def _resize_to_plan(image: Image, plan: GeometryPlan, mode='RGB', reducing_gap=None):
+        """
+        Resize visible part of actual image to its output size
+        :param image: Source Image object
+        :param plan: GeometryPlan for this image
+        :param mode: Mode of returned image
+        :param reducing_gap: If set, image is pre-shrunk with Image.reduce() down to this
+        many times the output size before LANCZOS resampling
+        :return: Image object of plan.paste_size
+        """
+        box = plan.source_box
+        if image.mode in ('P', '1'):
+            # These modes can be resized only with NEAREST filter, so convert only needed part
+            int_box = (math.floor(box[0]), math.floor(box[1]), math.ceil(box[2]), math.ceil(box[3]))
+            image = image.crop(int_box).convert(mode)
+            box = (box[0] - int_box[0], box[1] - int_box[1], box[2] - int_box[0], box[3] - int_box[1])
+        if plan.paste_size == (box[2] - box[0], box[3] - box[1]) and all(float(v).is_integer() for v in box):
+            # Nothing to resample
+            content = image.crop(tuple(int(v) for v in box))
+        else:
+            content = image.resize(plan.paste_size, Image.LANCZOS, box=box, reducing_gap=reducing_gap)
+        return content if content.mode == mode else content.convert(mode)
 
-        if square:
-            fill_color = (255, 255, 255)
-            _fill_color = kwargs.get('square_fill_color')
-            if _fill_color:
-                fill_color = (
-                    _fill_color['red'], _fill_color['green'], _fill_color['blue'])
-            im = self._make_square_image(im, has_transparency, fill_color)
-
-        if has_transparency and opaque:
-            fill_color = (255, 255, 255)
-            _fill_color = kwargs.get('opaque_fill_color')
-            if _fill_color:
-                fill_color = (
-                    _fill_color['red'], _fill_color['green'], _fill_color['blue'])
-            im = self._remove_transparency(im, fill_color)
-
-        if fit:
-            im = ImageOps.fit(
-                im, (image_settings['width'], image_settings['height']), Image.ANTIALIAS)
-
-        return im
+    def _render(self, image: Image, plan: GeometryPlan, has_alpha=False, opaque=True,
+                square_fill_color=(255, 255, 255), opaque_fill_color=(255, 255, 255), reducing_gap=None):
+        """
+        Make output image from source image by geometry plan.
+        Gives the same result as cropping, squaring, removing transparency and fitting
+        one after another, but all intermediate images have output resolution.
+        :param image: Source Image object
+        :param plan: GeometryPlan for this image
+        :param has_alpha: True if source image has an alpha channel
+        :param opaque: True if alpha channel should be removed
+        :return: Image object
+        """
+        content = None
+        if plan.paste_size[0] > 0 and plan.paste_size[1] > 0:
+            with self.profile.stage('resize'):
+                content = self._resize_to_plan(image, plan, 'RGBA' if has_alpha else 'RGB', reducing_gap)
+                self.profile.allocated(content)
 
-    @staticmethod
-    def _crop_to_actual_image(image: Image, color_limits=(252, 252, 252, 0)):
+        with self.profile.stage('compose'):
+            if has_alpha and opaque:
+                # Squaring borders are transparent, so they get opaque fill color too
+                output_image = Image.new('RGB', plan.output_size, opaque_fill_color)
+                if content:
+                    output_image.paste(content, box=plan.paste_box[:2], mask=content)
+            elif has_alpha:
+                output_image = Image.new('RGBA', plan.output_size, square_fill_color + (0,))
+                if content:
+                    output_image.paste(content, box=plan.paste_box[:2])
+            else:
+                output_image = Image.new('RGB', plan.output_size, square_fill_color)
+                if content:
+                    output_image.paste(content, box=plan.paste_box[:2])
+            self.profile.allocated(output_image)
+        return output_image
+
+    @classmethod
+    def _crop_to_actual_image(cls, image: Image, color_limits=(252, 252, 252, 0)):
         """
         Crop image to actual image, oriented by set color limits
         :param image: Image object
@@ -56,25 +257,18 @@ class ImageProcessor:
         will be cropped
         :return: Image object
         """
-        # Convert image to RGBA mode because it can be in mode 'P' for example, which has only 1 band.
-        _image = image.convert('RGBA')
+        return image.crop(cls._get_crop_box(image, color_limits))
 
-        data = numpy.array(_image)
-        red, green, blue, alpha = data.T
-
-        white_areas = (
-            ((red >= color_limits[0]) & (green >= color_limits[1]) & (blue >= color_limits[2])) |
-            (alpha <= color_limits[3])
-        )
-        data[...,][white_areas.T] = (255, 255, 255, 0)
-
-        _image = Image.fromarray(data)
-        rgb_image = Image.new(
-            mode='RGB', size=_image.size, color=(255, 255, 255))
-        image_components = _image.split()
-        rgb_image.paste(_image, mask=image_components[3])
-        crop_box = _image.getbbox()
-        return image.crop(crop_box)
+    @staticmethod
+    def _get_crop_box(image: Image, color_limits=(252, 252, 252, 0)):
+        """
+        Find box of actual image, oriented by set color limits
+        :param image: Image object
+        :param color_limits: Tuple for RBG color, image edges with colors above this limits
+        will be cropped
+        :return: Tuple (left, upper, right, lower) or None if there is no actual image
+        """
+        return Trimmer(color_limits).get_bbox(image)
 
     @staticmethod
     def _make_square_image(image: Image, has_alpha=False, fill_color=(255, 255, 255)):
@@ -115,21 +309,217 @@ class ImageProcessor:
 
 
 class ImageEditor(ImageProcessor):
-    def __init__(self, image_name: str, in_dir: str, out_dir: str, image_settings: dict, **kwargs):
-        image = Image.open(f'{in_dir}/{image_name}')
-        image_format = Path(image_name).suffix
-        opaque = kwargs.get('opaque')
-        if kwargs.get('simple_formats'):
-            if (any(a in image.getbands() for a in ('a', 'A', 'P'))) and not opaque:
-                image_format = '.png'
-            else:
-                image_format = '.jpg'
-        out_file_path = f'{out_dir}/{Path(image_name).stem}{image_format}'
-        if kwargs.get('no_rewrite'):
-            out_file_path = self._get_safe_path(out_file_path)
+    """
+    Process image file from in_dir and save its renditions to out_dir
+    :param data: Raw bytes of the input file, if it is already read, else file is opened by path
+    :param save: False to keep processed images in output_images until save() is called
+    :param control: BatchControl of the batch, checked after decoding and before saving
+    """
+
+    def __init__(self, image_name: str, in_dir: str, out_dir: str, image_settings: dict, data=None, save=True,
+                 control=None, **kwargs):
+        self.control = control
+        if kwargs.get('profile_stages'):
+            self.profile = ImageProfile()
+        # Flag for ignoring metadata of image, for ex. when it is
+        # too large and cause PIL to raise exception
+        self.loader = ImageLoader.from_options(kwargs)
+        self.in_file_path = f'{in_dir}/{image_name}'
+        self.data = data
+        with self.profile.stage('open'):
+            image = self._open()
+        self.profile.pixels(input_image=image)
+        if kwargs.get('fast_decode'):
+            with self.profile.stage('draft'):
+                image = self._draft(image, image_settings, **kwargs)
+        self.checkpoint()
+        self.encoder = kwargs.get('encoder')
+        image_format = choose_format(image_name, image.getbands(), kwargs.get('simple_formats'), kwargs.get('opaque'),
+                                     (self.encoder or {}).get('format', 'auto'))
 
-        image = self.process_image(image, image_settings, **kwargs)
-        image.save(out_file_path, quality=image_settings.get('quality', 75))
+        self.image_format = image_format
+        # Output suffix: [files, bytes, seconds] of encoding
+        self.encoding = {}
+        # Output paths which do not fit in max_size_kb, even with the lowest searched quality
+        self.oversized = []
+        self.renditions = self.get_renditions(image_settings)
+        reduced = None
+        strip_memory = kwargs.get('strip_memory_mb', 0) * 2 ** 20
+        if strip_memory and image_memory(image) > strip_memory:
+            reduced = self._reduce_in_strips(image, image_settings, strip_memory, **kwargs)
+        if reduced:
+            # Reduced image is already cropped
+            self.output_images = self.process_renditions(reduced, image_settings, **{**kwargs, 'crop': False})
+        else:
+            self.output_images = self.process_renditions(image, image_settings, **kwargs)
+        # Raw bytes are not needed after decoding
+        self.data = None
+        self.profile.pixels(output_image=self.output_images[0])
+        self.out_file_paths = self.get_output_paths(image_name, out_dir, self.renditions, image_format)
+        self.no_rewrite = kwargs.get('no_rewrite')
+        if save:
+            self.save()
+
+    @staticmethod
+    def get_output_paths(image_name: str, out_dir: str, renditions: list, image_format: str):
+        """
+        Output file paths of image renditions
+        :param image_format: Output suffix for renditions without their own format
+        :return: List of paths in order of renditions
+        """
+        # Images from input subfolders keep their relative path in output
+        out_name = Path(image_name).with_suffix('').as_posix()
+        out_file_paths = []
+        for rendition in renditions:
+            out_rendition_dir = f'{out_dir}/{rendition["subfolder"]}' if rendition['subfolder'] else out_dir
+            out_file_paths.append(
+                f'{out_rendition_dir}/{out_name}{rendition["suffix"]}{rendition["format"] or image_format}')
+        if len(set(out_file_paths)) < len(out_file_paths):
+            # Rendition with its own format can match the format chosen for the others
+            raise ValueError(f'Renditions have the same output file: {out_file_paths}')
+        return out_file_paths
+
+    def save(self):
+        """
+        Save output images of all renditions
+        """
+        # Cancelled image has either all renditions saved or none of them
+        self.checkpoint()
+        for index, (rendition, output_image) in enumerate(zip(self.renditions, self.output_images)):
+            out_file_path = self.out_file_paths[index]
+            os.makedirs(os.path.dirname(out_file_path), exist_ok=True)
+            if self.no_rewrite:
+                out_file_path = self.out_file_paths[index] = self._get_safe_path(out_file_path)
+            started = time.perf_counter()
+            with self.profile.stage('save'):
+                if rendition['max_size_kb']:
+                    # Only the final trial is written
+                    data, _, fits = encode_to_size(output_image, out_file_path, rendition['quality'],
+                                                   rendition['max_size_kb'] * 1024, self.encoder)
+                    with atomic_output(out_file_path) as output_file:
+                        output_file.write(data)
+                    if not fits:
+                        self.oversized.append(out_file_path)
+                else:
+                    save_image(output_image, out_file_path, rendition['quality'], self.encoder)
+            stats = self.encoding.setdefault(Path(out_file_path).suffix.lower(), [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += os.path.getsize(out_file_path)
+            stats[2] += time.perf_counter() - started
+        self.out_file_path = self.out_file_paths[0]
+        self.output_images = None
+
+    def checkpoint(self):
+        # Stage boundary, paused batch waits here and cancelled one raises Cancelled
+        if self.control:
+            self.control.checkpoint()
+
+    def _open(self):
+        """
+        Open input image, from raw bytes if they are already read
+        :return: Not loaded Image object
+        """
+        if self.data is None:
+            return self.loader.open(self.in_file_path)
+        try:
+            return self.loader.open(BytesIO(self.data))
+        except UnidentifiedImageError:
+            # PIL names the buffer, error report shows the file like for images opened from path
+            raise UnidentifiedImageError(f'cannot identify image file {self.in_file_path!r}') from None
+
+    def _draft(self, image: Image, image_settings: dict, crop=True, square=True, fit=True, **kwargs):
+        """
+        Ask JPEG decoder for DCT scaled image (1/2, 1/4 or 1/8 of the size) if output is small enough.
+        Crop box is found on a cheap 1/8 scaled probe first. Scale is chosen so the actual image
+        stays at least REDUCING_GAP times larger than output, so crop box found on scaled image
+        is wrong by less than half of output pixel.
+        :param image: Not loaded Image object
+        :return: Image object, scaled or not
+        """
+        if image.format != 'JPEG' or not fit or min(image.size) < 8:
+            # Tiny images gain nothing, and their draft size would be 0 px
+            return image
+
+        crop_box = (0, 0) + image.size
+        probe = None
+        if crop:
+            probe = self._open()
+            draft = probe.draft(probe.mode, (probe.size[0] // 8, probe.size[1] // 8))
+            if not draft:
+                return image
+            probe_scale = image.size[0] / draft[1][2]
+            try:
+                with self.loader.options():
+                    probe_box = self._get_crop_box(probe, self._get_color_limits(image_settings))
+            except OSError:
+                # Broken file, leave it for usual decoding and its error handling
+                return image
+            if probe_box:
+                crop_box = (
+                    math.floor(probe_box[0] * probe_scale), math.floor(probe_box[1] * probe_scale),
+                    min(math.ceil(probe_box[2] * probe_scale), image.size[0]),
+                    min(math.ceil(probe_box[3] * probe_scale), image.size[1]))
+
+        # The largest rendition decides
+        plan_scale = max(GeometryPlan(crop_box, square, (rendition['width'], rendition['height'])).scale
+                         for rendition in self.get_renditions(image_settings))
+        for scale in (8, 4, 2):
+            if scale * plan_scale * REDUCING_GAP <= 1:
+                break
+        else:
+            return image
+        if probe and probe_scale == scale:
+            # Probe is already decoded at needed scale
+            return probe
+        image.draft(image.mode, (image.size[0] // scale, image.size[1] // scale))
+        return image
+
+    def _reduce_in_strips(self, image: Image, image_settings: dict, strip_memory: int, crop=True, square=True,
+                          fit=True, **kwargs):
+        """
+        Crop and shrink image too large for memory, decoding it strip by strip twice: first pass finds
+        crop box, second pass reduces every strip of the crop box with Image.reduce() and pastes it
+        into the reduced image. Like _draft, image stays at least REDUCING_GAP times larger than output,
+        so squaring offset rounded in reduced pixels moves actual image by less than half of output pixel.
+        Final LANCZOS resize of the reduced image is done by process_renditions().
+        :param image: Not loaded Image object
+        :param strip_memory: Memory limit of one strip in bytes
+        :return: Cropped and reduced Image object, or None if image can not be decoded in strips
+        or does not need to be reduced
+        """
+        if not fit:
+            return None
+        reader = open_strip_reader(image, BytesIO(self.data) if self.data is not None else self.in_file_path)
+        if reader is None:
+            return None
+        width, height = image.size
+        rows = max(1, strip_memory // (width * STRIP_BYTES_PER_PIXEL))
+
+        crop_box = None
+        if crop:
+            with self.profile.stage('strips_crop_box'):
+                crop_box = Trimmer(self._get_color_limits(image_settings)).get_bbox_in_strips(
+                    reader.strips(0, height, rows), image.size)
+        crop_box = crop_box or (0, 0, width, height)
+
+        # The largest rendition decides
+        plan_scale = max(GeometryPlan(crop_box, square, (rendition['width'], rendition['height'])).scale
+                         for rendition in self.get_renditions(image_settings))
+        factor = int(1 / (plan_scale * REDUCING_GAP))
+        if factor < 2:
+            return None
+        # Every strip but the last is reduced to whole rows
+        rows = max(factor, rows // factor * factor)
+
+        left, upper, right, lower = crop_box
+        mode = 'RGBA' if any(a in image.getbands() for a in ('a', 'A', 'P')) else 'RGB'
+        with self.profile.stage('strips_reduce'):
+            reduced = Image.new(mode, (math.ceil((right - left) / factor), math.ceil((lower - upper) / factor)))
+            for top, strip in reader.strips(upper, lower, rows):
+                strip = strip.crop((left, 0, right, strip.size[1])).convert(mode)
+                reduced.paste(strip.reduce(factor), (0, (top - upper) // factor))
+            self.profile.allocated(reduced)
+        return reduced
 
     @staticmethod
     def _get_safe_path(path):
@@ -148,5 +538,51 @@ class EditorManager:
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def input_path(self):
+        return f'{self.args[1]}/{self.args[0]}'
+
+    def read(self):
+        """
+        Read raw bytes of input file, first stage of PipelineExecutor
+        """
+        if self.kwargs.get('control'):
+            self.kwargs['control'].checkpoint()
+        try:
+            with open(self.input_path, 'rb') as input_file:
+                return input_file.read()
+        except OSError as err:
+            mark_stage(err, 'read')
+            raise
+
+    def process(self, data=None):
+        """
+        Decode and process image without saving, second stage of PipelineExecutor
+        :return: ImageEditor with output images
+        """
+        return ImageEditor(*self.args, data=data, save=False, **self.kwargs)
+
+    def save(self, editor):
+        """
+        Save output images, last stage of PipelineExecutor
+        :return: Result record
+        """
+        editor.save()
+        return self.result(editor)
+
     def __call__(self):
-        ImageEditor(*self.args, **self.kwargs)
+        return self.result(ImageEditor(*self.args, **self.kwargs))
+
+    def result(self, editor):
+        # Small result record, so it is cheap to pass it between threads
+        return {
+            'image_name': self.args[0],
+            'output_path': editor.out_file_path,
+            'output_paths': editor.out_file_paths,
+            'output_format': editor.image_format,
+            'encoding': editor.encoding,
+            'oversized': editor.oversized,
+            'input_size': os.path.getsize(editor.in_file_path),
+            'output_size': sum(os.path.getsize(path) for path in editor.out_file_paths),
+            'profile': editor.profile.as_dict()
+        }
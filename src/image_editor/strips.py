@@ -0,0 +1,214 @@
+import struct
+import zlib
+
+from PIL import Image
+
+# Bytes of strip memory per decoded pixel: the strip itself, its RGBA conversion,
+# the content mask and temporary copies made by decoding
+STRIP_BYTES_PER_PIXEL = 16
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Channels of PNG color types
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# Modes which keep PNG rows byte for byte, by bytes per pixel of PNG filter
+PNG_BYTE_MODES = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+
+
+def open_strip_reader(image: Image, source):
+    """
+    Strip reader for the image, if its format can be decoded in strips:
+    not interlaced PNG up to 8 bits per channel or 16 bit grayscale, and
+    uncompressed formats such as uncompressed TIFF, BMP and PPM.
+    :param image: Opened, not loaded Image object
+    :param source: File path or file object of the image
+    :return: StripReader or None
+    """
+    if image.format == 'PNG':
+        return PngStripReader.open(image, source)
+    if image.tile and all(tile[0] == 'raw' for tile in image.tile):
+        return RawStripReader.open(image, source)
+    return None
+
+
+class StripReader:
+    """
+    Decodes image in horizontal strips, so only a strip of the image is in memory at once
+    :param image: Opened, not loaded Image object
+    :param source: File path or file object of the image
+    """
+
+    def __init__(self, image: Image, source):
+        self.mode = image.mode
+        self.size = image.size
+        # Tuple (rawmode, data) of the palette, read from the header
+        self.palette = image.palette.getdata() if image.mode == 'P' and image.palette else None
+        self.transparency = image.info.get('transparency')
+        self.source = source
+
+    def strips(self, upper: int, lower: int, rows: int):
+        """
+        Decode rows from upper to lower
+        :param rows: Rows in one strip
+        :return: Generator of (strip upper row, Image object)
+        """
+        with _open_source(self.source) as file:
+            for top in range(upper, lower, rows):
+                yield top, self._finish(self._read(file, top, min(top + rows, lower)))
+
+    def _finish(self, strip: Image):
+        # Palette and transparency are taken from the header of the whole image
+        if self.palette:
+            strip.putpalette(self.palette[1], self.palette[0])
+        if self.transparency is not None:
+            strip.info['transparency'] = self.transparency
+        return strip
+
+    def _read(self, file, upper: int, lower: int):
+        raise NotImplementedError
+
+
+class _KeepOpen:
+    # File object given by caller is not closed by strips()
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+def _open_source(source):
+    if isinstance(source, str):
+        return open(source, 'rb')
+    source.seek(0)
+    return _KeepOpen(source)
+
+
+class RawStripReader(StripReader):
+    """
+    Reads rows of uncompressed images directly from their file offsets
+    """
+
+    def __init__(self, image: Image, source, tiles):
+        super().__init__(image, source)
+        # Tuples of (upper, lower, offset, rawmode, stride, orientation)
+        self.tiles = tiles
+
+    @classmethod
+    def open(cls, image: Image, source):
+        tiles = []
+        for _, (left, upper, right, lower), offset, args in image.tile:
+            if left != 0 or right != image.size[0]:
+                # Only tiles of full width rows
+                return None
+            rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+            if not stride:
+                try:
+                    stride = len(Image.new(image.mode, (image.size[0], 1)).tobytes('raw', rawmode))
+                except ValueError:
+                    return None
+            tiles.append((upper, lower, offset, rawmode, stride, orientation))
+        return cls(image, source, tiles)
+
+    def _read(self, file, upper: int, lower: int):
+        width = self.size[0]
+        strip = None
+        for tile_upper, tile_lower, offset, rawmode, stride, orientation in self.tiles:
+            first, last = max(upper, tile_upper), min(lower, tile_lower)
+            if first >= last:
+                continue
+            if orientation < 0:
+                # Rows are stored from bottom to top
+                file.seek(offset + (tile_lower - last) * stride)
+            else:
+                file.seek(offset + (first - tile_upper) * stride)
+            part = Image.frombytes(self.mode, (width, last - first), file.read((last - first) * stride),
+                                   'raw', rawmode, stride, orientation)
+            if first == upper and last == lower:
+                return part
+            if strip is None:
+                strip = Image.new(self.mode, (width, lower - upper))
+            strip.paste(part, (0, first - upper))
+        if strip is None:
+            raise OSError('image file is truncated')
+        return strip
+
+
+class PngStripReader(StripReader):
+    """
+    Decompresses PNG data stream with zlib and lets Pillow reverse row filters one strip at a time.
+    Filters refer to the previous row, so the last row of the previous strip is prepended to every
+    strip unfiltered. Rows are decoded with a mode which keeps their bytes, then unpacked to image mode.
+    """
+
+    def __init__(self, image: Image, source, rawmode, row_bytes, filter_bytes):
+        super().__init__(image, source)
+        self.rawmode = rawmode
+        self.row_bytes = row_bytes
+        self.byte_mode = PNG_BYTE_MODES[filter_bytes]
+        self.byte_width = row_bytes // filter_bytes
+
+    @classmethod
+    def open(cls, image: Image, source):
+        if len(image.tile) != 1 or image.tile[0][0] != 'zip' or image.info.get('interlace'):
+            return None
+        with _open_source(source) as file:
+            header = file.read(8 + 8 + 13)
+        if header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR':
+            return None
+        width, height, bit_depth, color_type = struct.unpack('>IIBB', header[16:26])
+        bits = PNG_CHANNELS.get(color_type, 0) * bit_depth
+        filter_bytes = max(1, bits // 8)
+        if filter_bytes not in PNG_BYTE_MODES:
+            # 16 bit RGB and RGBA are decoded whole
+            return None
+        return cls(image, source, image.tile[0][3], (width * bits + 7) // 8, filter_bytes)
+
+    def strips(self, upper: int, lower: int, rows: int):
+        # Stream can be read only from the start, rows above upper are decoded and dropped
+        with _open_source(self.source) as file:
+            chunks = self._idat_chunks(file)
+            decompressor = zlib.decompressobj()
+            previous_row = bytes(self.row_bytes)
+            for top in list(range(0, upper, rows)) + list(range(upper, lower, rows)):
+                bottom = min(top + rows, upper if top < upper else lower)
+                data = self._decompress(chunks, decompressor, (bottom - top) * (self.row_bytes + 1))
+                # Previous row is stored with filter type 0 (None) in the same stream
+                unfiltered = Image.frombytes(
+                    self.byte_mode, (self.byte_width, bottom - top + 1),
+                    zlib.compress(b'\x00' + previous_row + data, 0), 'zip', self.byte_mode).tobytes()
+                previous_row = unfiltered[-self.row_bytes:]
+                if top < upper:
+                    continue
+                yield top, self._finish(Image.frombytes(
+                    self.mode, (self.size[0], bottom - top), unfiltered[self.row_bytes:], 'raw', self.rawmode))
+
+    @staticmethod
+    def _idat_chunks(file):
+        file.seek(8)
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                yield file.read(length)
+                file.seek(4, 1)
+            elif chunk_type == b'IEND':
+                return
+            else:
+                file.seek(length + 4, 1)
+
+    @staticmethod
+    def _decompress(chunks, decompressor, size: int):
+        data = bytearray()
+        while len(data) < size:
+            if decompressor.unconsumed_tail:
+                data += decompressor.decompress(decompressor.unconsumed_tail, size - len(data))
+                continue
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise OSError('image file is truncated')
+            data += decompressor.decompress(chunk, size - len(data))
+        return bytes(data)
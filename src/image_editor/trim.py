@@ -0,0 +1,102 @@
+import numpy
+from PIL import Image
+
+
+class Trimmer:
+    """
+    Finds box of actual image by scanning rows and columns inward from the image edges,
+    until the first not background pixel. Only the scanned border blocks are converted
+    to numpy arrays, image itself is not copied or changed.
+    :param color_limits: Tuple for RGBA color, pixels with all RGB bands above this limits
+    or alpha band below alpha limit are background
+    """
+    # Blocks grow from FIRST_BLOCK to MAX_BLOCK lines, as actual image
+    # is usually found close to the edges.
+    FIRST_BLOCK = 16
+    MAX_BLOCK = 512
+
+    def __init__(self, color_limits=(252, 252, 252, 0)):
+        self.color_limits = color_limits
+
+    def get_bbox(self, image: Image):
+        """
+        Find box of actual image
+        :param image: Image object
+        :return: Tuple (left, upper, right, lower) or None if whole image is background
+        """
+        width, height = image.size
+        upper = self._find_edge(image, (0, 0, width, height), vertical=True)
+        if upper is None:
+            return None
+        lower = self._find_edge(image, (0, upper, width, height), vertical=True, reverse=True)
+        # Left and right edges are searched only between upper and lower edges
+        left = self._find_edge(image, (0, upper, width, lower), vertical=False)
+        right = self._find_edge(image, (left, upper, width, lower), vertical=False, reverse=True)
+        return left, upper, right, lower
+
+    def get_bbox_in_strips(self, strips, size):
+        """
+        Find box of actual image decoded strip by strip, only one strip is in memory at once
+        :param strips: Iterable of (strip upper row, Image object) covering the whole image, see StripReader
+        :param size: Tuple (width, height) of the image
+        :return: Tuple (left, upper, right, lower) or None if whole image is background
+        """
+        columns = numpy.zeros(size[0], dtype=bool)
+        upper = lower = None
+        for top, strip in strips:
+            mask = self._content_mask(strip)
+            rows = numpy.flatnonzero(mask.any(axis=1))
+            if rows.size:
+                if upper is None:
+                    upper = top + int(rows[0])
+                lower = top + int(rows[-1]) + 1
+                columns |= mask.any(axis=0)
+        if upper is None:
+            return None
+        found = numpy.flatnonzero(columns)
+        return int(found[0]), upper, int(found[-1]) + 1, lower
+
+    def _find_edge(self, image: Image, box, vertical=True, reverse=False):
+        """
+        Scan area of image block by block for the first line with actual image
+        :param image: Image object
+        :param box: Tuple (left, upper, right, lower) of the area to scan
+        :param vertical: True to scan rows, False to scan columns
+        :param reverse: True to scan from the lower or right edge
+        :return: Coordinate of the edge, exclusive if reverse is True, or None
+        """
+        start, end = (box[1], box[3]) if vertical else (box[0], box[2])
+        position = end if reverse else start
+        block = self.FIRST_BLOCK
+        while start < position if reverse else position < end:
+            if reverse:
+                low, high = max(start, position - block), position
+            else:
+                low, high = position, min(end, position + block)
+            block_box = (box[0], low, box[2], high) if vertical else (low, box[1], high, box[3])
+            lines = self._content_mask(image.crop(block_box)).any(axis=1 if vertical else 0)
+            found = numpy.flatnonzero(lines)
+            if found.size:
+                return low + int(found[-1]) + 1 if reverse else low + int(found[0])
+            position = low if reverse else high
+            block = min(block * 2, self.MAX_BLOCK)
+        return None
+
+    def _content_mask(self, image: Image):
+        """
+        Mask of actual image pixels
+        :param image: Small Image object
+        :return: Boolean numpy array of image height x width
+        """
+        if image.mode not in ('RGB', 'RGBA'):
+            # Convert only the block, mode can be 'P' or 'L' for example
+            image = image.convert('RGBA')
+        data = numpy.asarray(image)
+        red_limit, green_limit, blue_limit, alpha_limit = self.color_limits
+        mask = (data[..., 0] < red_limit) | (data[..., 1] < green_limit) | (data[..., 2] < blue_limit)
+        if image.mode == 'RGBA':
+            mask &= data[..., 3] > alpha_limit
+        elif alpha_limit >= 255:
+            # Opaque image is fully transparent for such limit
+            mask[...] = False
+        return mask
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+from src.config.config import Configuration
+
+
+class NullJournal:
+    """
+    Journal that records nothing, used for batches which are not resumed, like watched ones
+    """
+
+    def resume(self, image_names: list):
+        return {}
+
+    def started(self, image_name: str):
+        pass
+
+    def done(self, result: dict):
+        pass
+
+    def failed(self, image_name: str, record: dict):
+        pass
+
+    def finish(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BatchJournal(NullJournal):
+    """
+    Append-only record of the last batch of an output directory, one JSON line per event:
+    planned (images and settings), started, done (with output paths), failed (with error) and finished.
+    A batch without finished event was stopped, by cancelling or by a crash. The next batch with
+    the same input directory, settings and images resumes it, so images done before are not processed
+    again. Lines are flushed to the file system after each event, so they survive a crash of the app.
+    :param input_directory: Input directory of the batch
+    :param output_directory: Output directory of the batch
+    :param settings: settings_key() of the batch
+    """
+    JOURNAL_FOLDER = os.path.join(Configuration.APP_CONFIG_FOLDER, 'journal')
+
+    def __init__(self, input_directory: str, output_directory: str, settings: str):
+        directory_key = hashlib.blake2b(os.path.abspath(output_directory).encode(), digest_size=16).hexdigest()
+        self.path = os.path.join(self.JOURNAL_FOLDER, f'{directory_key}.jsonl')
+        self.input_directory = os.path.abspath(input_directory)
+        self.settings = settings
+        self._file = None
+
+    def resume(self, image_names: list):
+        """
+        Start journal of the batch, or continue the stopped batch with the same settings and images
+        :param image_names: All images of the batch
+        :return: Dict of image name: done record, for images done before the batch was stopped
+        whose output files still exist
+        """
+        done = self._stopped_batch(image_names)
+        os.makedirs(self.JOURNAL_FOLDER, exist_ok=True)
+        if done is None:
+            # New batch replaces the journal of the previous one
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({'event': 'planned', 'input_directory': self.input_directory, 'settings': self.settings,
+                         'images': image_names})
+            return {}
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._write({'event': 'resumed'})
+        return {image_name: record for image_name, record in done.items()
+                if all(os.path.exists(path) for path in record['output_paths'])}
+
+    def started(self, image_name: str):
+        self._write({'event': 'started', 'image_name': image_name})
+
+    def done(self, result: dict):
+        """
+        :param result: Result record of EditorManager or linked duplicate
+        """
+        record = {'event': 'done', 'image_name': result['image_name'], 'output_paths': result['output_paths']}
+        if 'fingerprint' in result:
+            # Resumed images are put to the result cache without reading them again
+            record['fingerprint'] = result['fingerprint']
+        self._write(record)
+
+    def failed(self, image_name: str, record: dict):
+        """
+        :param record: Error record, see error_record()
+        """
+        self._write({'event': 'failed', 'image_name': image_name,
+                     **{key: record[key] for key in ('stage', 'exception', 'message')}})
+
+    def finish(self):
+        self._write({'event': 'finished'})
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def _stopped_batch(self, image_names: list):
+        """
+        Done images of the journal, if its batch was stopped and had the same settings and images
+        :return: Dict of image name: done record, None if there is nothing to resume
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as journal_file:
+                lines = journal_file.readlines()
+        except OSError:
+            return None
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Last line can be cut by a crash
+                continue
+        planned = records[0] if records else {}
+        if planned.get('event') != 'planned' or planned.get('input_directory') != self.input_directory \
+                or planned.get('settings') != self.settings or sorted(planned.get('images', ())) != sorted(image_names):
+            return None
+        done = {}
+        for record in records[1:]:
+            if record['event'] == 'finished':
+                return None
+            if record['event'] == 'done':
+                done[record['image_name']] = record
+            elif record['event'] == 'failed':
+                done.pop(record['image_name'], None)
+        return done
@@ -0,0 +1,124 @@
+import threading
+from contextlib import contextmanager
+
+from PIL import Image, ImageFile
+
+# Largest image opened by default, in pixels
+DEFAULT_MAX_PIXELS = 1000 * 10 ** 6
+
+
+class ThreadFlag:
+    """
+    Boolean flag with its own value in every thread
+    :param default: Value in threads which did not set it
+    """
+
+    def __init__(self, default=False):
+        self.default = default
+        self._local = threading.local()
+
+    def __bool__(self):
+        return getattr(self._local, 'value', self.default)
+
+    def set(self, value: bool):
+        """
+        :return: Previous value in the current thread
+        """
+        previous = bool(self)
+        self._local.value = value
+        return previous
+
+
+# PIL reads ImageFile.LOAD_TRUNCATED_IMAGES while opening and decoding, so it is replaced
+# once with a flag that ImageLoader sets only in the thread of its job
+LOAD_TRUNCATED_IMAGES = ThreadFlag(bool(ImageFile.LOAD_TRUNCATED_IMAGES))
+ImageFile.LOAD_TRUNCATED_IMAGES = LOAD_TRUNCATED_IMAGES
+_max_pixels_lock = threading.Lock()
+
+
+def allow_pixels(max_pixels: int):
+    """
+    Raise PIL global size limit to max_pixels if it is lower, so PIL does not reject or warn about
+    images which the job allows. The limit is never lowered or removed, other code keeps
+    at least PIL default protection from decompression bombs.
+    :param max_pixels: Limit of the job, 0 keeps PIL limit
+    """
+    with _max_pixels_lock:
+        if max_pixels and Image.MAX_IMAGE_PIXELS is not None and max_pixels > Image.MAX_IMAGE_PIXELS:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def format_names(suffixes):
+    """
+    PIL format names of file suffixes, unknown suffixes are skipped
+    :param suffixes: List of suffixes, for ex. ['.jpg', '.png']
+    :return: Sorted list of format names, for ex. ['JPEG', 'PNG']
+    """
+    Image.init()
+    return sorted({Image.EXTENSION[suffix.lower()] for suffix in suffixes if suffix.lower() in Image.EXTENSION})
+
+
+class ImageLoader:
+    """
+    Opens and decodes images with decoder options of one job, without changing them for other threads
+    :param load_truncated: True to decode truncated files and skip broken metadata
+    :param max_pixels: Images larger than this are rejected by their header, before pixels are allocated,
+    0 for PIL default limit only
+    :param formats: PIL format names which are tried to open the file, None for all formats
+    """
+
+    def __init__(self, load_truncated=False, max_pixels=DEFAULT_MAX_PIXELS, formats=None):
+        self.load_truncated = load_truncated
+        self.max_pixels = max_pixels
+        self.formats = formats
+
+    @classmethod
+    def from_options(cls, options: dict):
+        """
+        Loader of a job with ImageEditor keyword arguments, see editor_options()
+        """
+        return cls(options.get('ignore_image_metadata', False), options.get('max_image_pixels', DEFAULT_MAX_PIXELS),
+                   options.get('image_formats'))
+
+    @property
+    def key(self):
+        # Loaders with equal keys decode images the same way
+        return self.load_truncated, self.max_pixels, tuple(self.formats or ())
+
+    @contextmanager
+    def options(self):
+        """
+        Decoder options of the job for code in the block, in the current thread only
+        """
+        if ImageFile.LOAD_TRUNCATED_IMAGES is not LOAD_TRUNCATED_IMAGES:
+            # Flag was assigned by other code
+            ImageFile.LOAD_TRUNCATED_IMAGES = LOAD_TRUNCATED_IMAGES
+        previous = LOAD_TRUNCATED_IMAGES.set(self.load_truncated)
+        try:
+            yield
+        finally:
+            LOAD_TRUNCATED_IMAGES.set(previous)
+
+    def open(self, source):
+        """
+        Open image and check its size, only header is read
+        :param source: File path or file object
+        :return: Not loaded Image object
+        """
+        allow_pixels(self.max_pixels)
+        with self.options():
+            image = Image.open(source, formats=self.formats)
+        pixels = image.size[0] * image.size[1]
+        if self.max_pixels and pixels > self.max_pixels:
+            image.close()
+            raise Image.DecompressionBombError(
+                f'Image size ({pixels} pixels) exceeds limit of {self.max_pixels} pixels, '
+                f'could be decompression bomb DOS attack.')
+        return image
+
+    def load(self, image: Image):
+        """
+        Decode pixels of opened image
+        """
+        with self.options():
+            image.load()
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class PipelineExecutor:
+    """
+    Executor with reader, processing and writer stages, each stage has its own thread pool.
+    Readers prefetch raw input files into a bounded buffer, so disk or network latency
+    overlaps with processing, and writers encode and save output images.
+    A stage blocks when the buffer after it is full, so fast readers can not fill the memory.
+    Submitted jobs must have read(), process(data) and save(editor) methods, like EditorManager.
+    :param workers: Processing threads
+    :param readers: Reading threads
+    :param writers: Writing threads
+    :param prefetch: Maximum raw input files read and not processed yet
+    """
+
+    def __init__(self, workers: int, readers=2, writers=2, prefetch=8):
+        self.readers = ThreadPoolExecutor(max(1, readers), thread_name_prefix='reader')
+        self.workers = ThreadPoolExecutor(max(1, workers), thread_name_prefix='worker')
+        self.writers = ThreadPoolExecutor(max(1, writers), thread_name_prefix='writer')
+        self.read_slots = threading.BoundedSemaphore(max(1, prefetch))
+        # Processed images waiting for a writer
+        self.write_slots = threading.BoundedSemaphore(2 * max(1, writers))
+
+    def submit(self, job):
+        """
+        Schedule job for reading
+        :return: Future with the job result record
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.readers.submit(self._read, job, future)
+        return future
+
+    def _read(self, job, future):
+        self.read_slots.acquire()
+        try:
+            data = job.read()
+        except BaseException as err:
+            self.read_slots.release()
+            future.set_exception(err)
+            return
+        self.workers.submit(self._process, job, data, future)
+
+    def _process(self, job, data, future):
+        try:
+            editor = job.process(data)
+        except BaseException as err:
+            future.set_exception(err)
+            return
+        finally:
+            self.read_slots.release()
+        self.write_slots.acquire()
+        self.writers.submit(self._write, job, editor, future)
+
+    def _write(self, job, editor, future):
+        try:
+            future.set_result(job.save(editor))
+        except BaseException as err:
+            future.set_exception(err)
+        finally:
+            self.write_slots.release()
+
+    def shutdown(self, wait=True):
+        # Each stage feeds the next one, so they are stopped in order
+        self.readers.shutdown(wait)
+        self.workers.shutdown(wait)
+        self.writers.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+
+import numpy
+from PIL import Image
+
+from src.image_editor.image_editor import REDUCING_GAP, ImageProcessor
+from src.loader.loader import ImageLoader
+
+# Preview images are not larger than this in both dimensions
+PREVIEW_SIZE = 480
+# Crop boxes of this many last color limits are kept
+CROP_BOX_CACHE = 64
+
+
+class PreviewProcessor(ImageProcessor):
+    """
+    Processes one image at preview resolution again and again while settings change.
+    Image is decoded once and reduced to REDUCING_GAP times the preview size, its pixels are kept
+    as numpy array for finding crop box, and crop boxes are cached by color limits.
+    :param path: Image file path
+    :param size: Preview size in pixels
+    :param loader: ImageLoader of the job
+    """
+
+    def __init__(self, path: str, size=PREVIEW_SIZE, loader=None):
+        self.size = size
+        self.loader = loader or ImageLoader()
+        source_size = int(size * REDUCING_GAP)
+        with self.loader.open(path) as image:
+            # Source of the output, JPEG is decoded by draft
+            with self.loader.options():
+                image.thumbnail((source_size, source_size), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+            self.has_alpha = any(a in image.getbands() for a in ('a', 'A', 'P'))
+            self.source = image.convert('RGBA' if self.has_alpha else 'RGB')
+        self.before = self.source.copy()
+        self.before.thumbnail((size, size), Image.LANCZOS)
+        self.pixels = numpy.asarray(self.source.convert('RGBA'))
+        self._crop_boxes = OrderedDict()
+
+    def render(self, image_settings: dict, **kwargs):
+        """
+        Process the image with settings scaled down to preview size
+        :param image_settings: output_image_settings dict, renditions are ignored
+        :param kwargs: ImageEditor keyword arguments, see editor_options()
+        :return: Image object not larger than preview size
+        """
+        width, height = image_settings['width'], image_settings['height']
+        scale = min(1.0, self.size / max(width, height))
+        preview_settings = {**image_settings, 'width': max(1, round(width * scale)),
+                            'height': max(1, round(height * scale)), 'renditions': []}
+        output_image = self.process_image(self.source, preview_settings, **kwargs)
+        if max(output_image.size) > self.size:
+            # Not fitted output has the size of cropped source
+            output_image.thumbnail((self.size, self.size), Image.LANCZOS)
+        return output_image
+
+    def _get_crop_box(self, image: Image, color_limits=(252, 252, 252, 0)):
+        if image is not self.source:
+            return super()._get_crop_box(image, color_limits)
+        color_limits = tuple(color_limits)
+        if color_limits not in self._crop_boxes:
+            self._crop_boxes[color_limits] = self._find_crop_box(color_limits)
+            while len(self._crop_boxes) > CROP_BOX_CACHE:
+                self._crop_boxes.popitem(last=False)
+        self._crop_boxes.move_to_end(color_limits)
+        return self._crop_boxes[color_limits]
+
+    def _find_crop_box(self, color_limits):
+        # Whole source is small, so mask is made at once instead of scanning from the edges
+        red_limit, green_limit, blue_limit, alpha_limit = color_limits
+        data = self.pixels
+        mask = (data[..., 0] < red_limit) | (data[..., 1] < green_limit) | (data[..., 2] < blue_limit)
+        if self.has_alpha:
+            mask &= data[..., 3] > alpha_limit
+        elif alpha_limit >= 255:
+            return None
+        rows = numpy.flatnonzero(mask.any(axis=1))
+        if not rows.size:
+            return None
+        columns = numpy.flatnonzero(mask.any(axis=0))
+        return int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1
@@ -0,0 +1,176 @@
+import csv
+import json
+import math
+import time
+from contextlib import contextmanager
+
+from PIL import Image
+
+from src.errors.errors import mark_stage
+
+PERCENTILES = (50, 90, 99)
+
+
+def image_memory(image: Image):
+    """
+    Estimated size of image buffer in bytes.
+    PIL keeps multiband images with 4 bytes per pixel, 'L', 'P' and '1' with 1 byte.
+    """
+    if image.mode in ('1', 'L', 'P'):
+        pixel_size = 1
+    elif image.mode.startswith('I;16'):
+        pixel_size = 2
+    else:
+        pixel_size = 4
+    return image.size[0] * image.size[1] * pixel_size
+
+
+class NullProfile:
+    """
+    Profile that records nothing, used when profiling is off
+    """
+
+    @contextmanager
+    def stage(self, name):
+        try:
+            yield
+        except Exception as err:
+            mark_stage(err, name)
+            raise
+
+    def allocated(self, image: Image):
+        pass
+
+    def pixels(self, input_image=None, output_image=None):
+        pass
+
+    def as_dict(self):
+        return None
+
+
+class ImageProfile(NullProfile):
+    """
+    Wall time and allocated image memory of each processing stage of one image
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.stage_bytes = {}
+        self.input_pixels = 0
+        self.output_pixels = 0
+        self._current = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure wall time of the code block. Same stage can be entered several times.
+        :param name: Stage name
+        """
+        previous, self._current = self._current, name
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as err:
+            mark_stage(err, name)
+            raise
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+            self._current = previous
+
+    def allocated(self, image: Image):
+        """
+        Count image buffer created in the current stage
+        :param image: Image object
+        """
+        if self._current:
+            self.stage_bytes[self._current] = self.stage_bytes.get(self._current, 0) + image_memory(image)
+
+    def pixels(self, input_image=None, output_image=None):
+        if input_image:
+            self.input_pixels = input_image.size[0] * input_image.size[1]
+        if output_image:
+            self.output_pixels = output_image.size[0] * output_image.size[1]
+
+    @property
+    def peak_bytes(self):
+        # Decoded image stays alive while every next stage allocates its buffers
+        decoded = self.stage_bytes.get('decode', 0)
+        others = [size for name, size in self.stage_bytes.items() if name != 'decode']
+        return decoded + max(others, default=0)
+
+    def as_dict(self):
+        return {
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'stage_bytes': dict(self.stage_bytes),
+            'peak_bytes': self.peak_bytes,
+            'input_pixels': self.input_pixels,
+            'output_pixels': self.output_pixels
+        }
+
+
+def _percentile(values, percent):
+    """
+    Nearest-rank percentile of sorted values
+    """
+    index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(records: list):
+    """
+    Aggregate image profiles of a batch
+    :param records: List of result records with 'profile' key
+    :return: Dict of stage name to dict of count, total, mean, max and percentiles in seconds,
+    plus 'peak_bytes' with the same statistics in bytes
+    """
+    series = {}
+    for record in records:
+        profile = record.get('profile')
+        if not profile:
+            continue
+        for name, seconds in profile['stages'].items():
+            series.setdefault(name, []).append(seconds)
+        series.setdefault('peak_bytes', []).append(profile['peak_bytes'])
+
+    summary = {}
+    for name, values in series.items():
+        values.sort()
+        summary[name] = {
+            'count': len(values),
+            'total': round(sum(values), 6),
+            'mean': round(sum(values) / len(values), 6),
+            'max': values[-1],
+            **{f'p{percent}': _percentile(values, percent) for percent in PERCENTILES}
+        }
+    return summary
+
+
+def dump_json(records: list, path: str):
+    """
+    Save image profiles and batch summary to JSON file
+    """
+    data = {
+        'summary': summarize(records),
+        'images': [{'image_name': record['image_name'], **record['profile']}
+                   for record in records if record.get('profile')]
+    }
+    with open(path, 'w') as json_file:
+        json.dump(data, json_file, indent=2)
+
+
+def dump_csv(records: list, path: str):
+    """
+    Save image profiles to CSV file, one row per image and one column per stage
+    """
+    records = [record for record in records if record.get('profile')]
+    stages = []
+    for record in records:
+        stages += [name for name in record['profile']['stages'] if name not in stages]
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['image_name', 'input_pixels', 'output_pixels', 'peak_bytes'] + stages)
+        for record in records:
+            profile = record['profile']
+            writer.writerow(
+                [record['image_name'], profile['input_pixels'], profile['output_pixels'], profile['peak_bytes']] +
+                [profile['stages'].get(name, '') for name in stages])
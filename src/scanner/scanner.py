@@ -0,0 +1,62 @@
+import os
+import time
+
+# Directory listings changed less than this before the scan are not reused,
+# a file added in the same mtime tick would be missed otherwise
+RACY_INTERVAL_NS = 2 * 10 ** 9
+
+
+class DirectoryScanner:
+    """
+    Lists image files with os.scandir, file types come from directory entries without extra stat calls.
+    Listing of every directory is cached with its modification time, which changes when files are
+    added, removed or renamed, so rescanning an unchanged directory costs one stat per folder.
+    :param input_formats: List of allowed file suffixes, for ex. ['.jpg', '.png']
+    :param recursive: True to include images from subfolders
+    """
+
+    def __init__(self, input_formats: list, recursive=False):
+        self.input_formats = tuple(input_formats)
+        self.recursive = recursive
+        # Directory path: (mtime_ns, file names, subfolder names)
+        self.listings = {}
+
+    def scan(self, directory: str):
+        """
+        List image files in directory
+        :param directory: Path to the folder with images
+        :return: Sorted list of file paths relative to directory with '/' separators
+        """
+        images = []
+        folders = ['']
+        while folders:
+            folder = folders.pop()
+            files, subfolders = self._list(os.path.join(directory, folder) if folder else directory)
+            prefix = f'{folder}/' if folder else ''
+            images.extend(prefix + name for name in files)
+            if self.recursive:
+                folders.extend(prefix + name for name in subfolders)
+        images.sort()
+        return images
+
+    def _list(self, path: str):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self.listings.pop(path, None)
+            return [], []
+        cached = self.listings.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+
+        files, subfolders = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    if os.path.splitext(entry.name)[1].lower() in self.input_formats:
+                        files.append(entry.name)
+                elif self.recursive and entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.name)
+        if time.time_ns() - mtime_ns > RACY_INTERVAL_NS:
+            self.listings[path] = mtime_ns, files, subfolders
+        return files, subfolders
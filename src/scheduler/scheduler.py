@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+
+from PIL import Image
+
+from src.image_editor.image_editor import ImageProcessor
+from src.image_editor.strips import open_strip_reader
+from src.profiler.profiler import image_memory
+
+
+def estimate_memory(path: str, image_settings: dict, strip_memory=0):
+    """
+    Estimate peak memory of processing the image from its header only, Image.open does not decode pixels.
+    Decoded image stays alive while palette conversion of the crop box and output sized
+    canvas, content and renditions are allocated.
+    :param path: Image file path
+    :param image_settings: output_image_settings dict
+    :param strip_memory: Strip memory limit in bytes, larger images which can be decoded in strips
+    are never decoded whole, see ImageEditor._reduce_in_strips
+    :return: Estimated bytes, 0 if header can not be read
+    """
+    try:
+        with Image.open(path) as image:
+            decoded = image_memory(image)
+            converted = image.size[0] * image.size[1] * 4 if image.mode in ('1', 'P') else 0
+            if strip_memory and decoded > strip_memory and open_strip_reader(image, path):
+                decoded, converted = strip_memory, 0
+    except Exception:
+        # Worker will report the error
+        return 0
+    outputs = sum(rendition['width'] * rendition['height'] * 4
+                  for rendition in ImageProcessor.get_renditions(image_settings))
+    # Resized content, canvas and the largest rendition are alive together
+    return decoded + converted + 3 * outputs
+
+
+class MemoryScheduler:
+    """
+    Admits images to the worker pool while their estimated memory fits the budget,
+    in order of the queue. Image larger than the whole budget runs alone.
+    :param budget: Memory budget in bytes, 0 for no limit
+    :param max_in_flight: Maximum images in work at the same time
+    """
+
+    def __init__(self, budget: int, max_in_flight: int):
+        self.budget = budget
+        self.max_in_flight = max_in_flight
+        self.pending = deque()
+        self.in_flight = 0
+        self.in_flight_bytes = 0
+        self.peak_in_flight_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, items):
+        """
+        :param items: Iterable of (item, estimated bytes)
+        """
+        with self._lock:
+            self.pending.extend(items)
+
+    def admit(self):
+        """
+        Take next items that fit in the budget from the queue
+        :return: List of (item, estimated bytes)
+        """
+        admitted = []
+        with self._lock:
+            while self.pending and self.in_flight < self.max_in_flight:
+                item, size = self.pending[0]
+                if self.in_flight and self.budget and self.in_flight_bytes + size > self.budget:
+                    break
+                self.pending.popleft()
+                self.in_flight += 1
+                self.in_flight_bytes += size
+                admitted.append((item, size))
+            self.peak_in_flight_bytes = max(self.peak_in_flight_bytes, self.in_flight_bytes)
+        return admitted
+
+    def release(self, size: int):
+        with self._lock:
+            self.in_flight -= 1
+            self.in_flight_bytes -= size
+
+    def drop(self):
+        """
+        Remove all items which were not admitted yet
+        :return: List of dropped items
+        """
+        with self._lock:
+            dropped = [item for item, _ in self.pending]
+            self.pending.clear()
+        return dropped
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    def stats(self):
+        """
+        Queue depth and memory in flight, for monitoring
+        """
+        with self._lock:
+            return {
+                'queue_depth': len(self.pending),
+                'in_flight': self.in_flight,
+                'in_flight_bytes': self.in_flight_bytes,
+                'peak_in_flight_bytes': self.peak_in_flight_bytes,
+                'budget': self.budget
+            }
@@ -0,0 +1,147 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from src.config.config import Configuration
+from src.image_editor.strips import STRIP_BYTES_PER_PIXEL, open_strip_reader
+from src.loader.loader import ImageLoader
+from src.profiler.profiler import image_memory
+
+# Thumbnails are not larger than this in both dimensions
+THUMBNAIL_SIZE = 96
+# Images other than JPEG with larger decoded buffer are read in strips of this size,
+# or get no thumbnail if their format can not be read in strips
+THUMBNAIL_MEMORY = 64 * 2 ** 20
+# Least recently used thumbnails are removed when the cache folder grows larger
+MAX_CACHE_BYTES = 100 * 2 ** 20
+
+
+class ThumbnailCache:
+    """
+    Small PNG previews of images, stored on disk by file path, modification time and size,
+    so a changed file gets a new thumbnail and unchanged ones are never decoded again.
+    :param size: Thumbnail size in pixels
+    :param folder: Cache folder
+    """
+    CACHE_FOLDER = os.path.join(Configuration.APP_CONFIG_FOLDER, 'thumbnails')
+
+    def __init__(self, size=THUMBNAIL_SIZE, folder=None):
+        self.size = size
+        self.folder = folder or self.CACHE_FOLDER
+        self.loader = ImageLoader()
+
+    def key(self, path: str):
+        """
+        Cache key of the file, stat only
+        :return: Hex digest string
+        """
+        stat = os.stat(path)
+        text = f'{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}\0{self.size}'
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def thumbnail(self, path: str):
+        """
+        PNG bytes of the thumbnail, made and saved to the cache if it is not there yet
+        :param path: Image file path
+        :return: Bytes, None if the image can not be decoded
+        """
+        try:
+            key = self.key(path)
+        except OSError:
+            return None
+        # Keys are spread over 256 folders, so no folder gets too large
+        cache_path = os.path.join(self.folder, key[:2], f'{key}.png')
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                data = cache_file.read()
+            # Modification time of cached thumbnail is its last use, see prune()
+            os.utime(cache_path)
+            return data
+        except OSError:
+            pass
+        try:
+            data = self.make(path)
+        except Exception:
+            # Broken or unsupported file is shown without preview
+            return None
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Other window can make the same thumbnail at the same time
+        temporary_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(temporary_path, cache_path)
+        return data
+
+    def make(self, path: str):
+        """
+        Decode image at reduced size and encode its thumbnail
+        :return: PNG bytes
+        """
+        with self.loader.open(path) as image:
+            if image.format != 'JPEG' and image_memory(image) > THUMBNAIL_MEMORY:
+                image = self._reduce_in_strips(image, path)
+            # JPEG is decoded by draft at 1/2 to 1/8 scale, other formats are shrunk with reduce()
+            image.thumbnail((self.size, self.size), Image.BICUBIC, reducing_gap=2.0)
+            thumbnail = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        buffer = BytesIO()
+        thumbnail.save(buffer, 'PNG', compress_level=1)
+        return buffer.getvalue()
+
+    def _reduce_in_strips(self, image: Image, path: str):
+        """
+        Shrink large image strip by strip to about twice the thumbnail size,
+        so it is never decoded whole in the GUI process
+        :param image: Opened, not loaded Image object
+        :return: Reduced Image object
+        """
+        reader = open_strip_reader(image, path)
+        if reader is None:
+            raise ValueError(f'Image is too large for a thumbnail: {image.size[0]}x{image.size[1]}')
+        width, height = image.size
+        # Thumbnail fits the longer side, reducing_gap of thumbnail() needs it twice as large
+        factor = max(1, max(width, height) // (2 * self.size))
+        # Every strip but the last is reduced to whole rows
+        rows = max(factor, THUMBNAIL_MEMORY // (width * STRIP_BYTES_PER_PIXEL) // factor * factor)
+        mode = 'RGBA' if any(a in image.getbands() for a in ('a', 'A', 'P')) or 'transparency' in image.info \
+            else 'RGB'
+        reduced = Image.new(mode, (math.ceil(width / factor), math.ceil(height / factor)))
+        for top, strip in reader.strips(0, height, rows):
+            reduced.paste(strip.convert(mode).reduce(factor), (0, top // factor))
+        return reduced
+
+    def prune(self, max_bytes=MAX_CACHE_BYTES):
+        """
+        Remove least recently used thumbnails until the cache folder is not larger than max_bytes,
+        and temporary files left by a crash
+        """
+        files = []
+        for directory, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp') and stat.st_mtime < time.time() - 3600:
+                    self._remove(path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # Removed by other window
+            pass
@@ -0,0 +1,73 @@
+import os
+import time
+
+from send2trash import send2trash
+
+CLEAR_MODES = ('trash', 'rename')
+# Files per send2trash call, one call is one shell operation on Windows and macOS
+TRASH_BATCH = 100
+
+
+def list_files(directory: str):
+    """
+    Paths of files in directory, subfolders are not included
+    """
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.is_file()]
+
+
+def clear_directory(directory: str, mode='trash', trash_directory=None, progress=None, stop=None):
+    """
+    Move files of directory to trash
+    :param directory: Directory to clear
+    :param mode: 'trash' sends files to system trash in batches, 'rename' moves files into a new folder
+    of trash_directory, one rename per file without copying. Falls back to 'trash' if trash_directory
+    is on another filesystem or inside directory.
+    :param trash_directory: Folder for 'rename' mode
+    :param progress: Callable, receives (done, total) after each batch
+    :param stop: threading.Event, clearing stops after the current batch when it is set
+    :return: Number of cleared files
+    """
+    if mode == 'rename' and trash_directory and not _is_inside(trash_directory, directory):
+        os.makedirs(trash_directory, exist_ok=True)
+        if os.stat(trash_directory).st_dev == os.stat(directory).st_dev:
+            return _rename_to_trash(directory, trash_directory, progress, stop)
+
+    files = list_files(directory)
+    total = len(files)
+    for start in range(0, total, TRASH_BATCH):
+        if stop and stop.is_set():
+            return start
+        send2trash(files[start:start + TRASH_BATCH])
+        if progress:
+            progress(min(start + TRASH_BATCH, total), total)
+    return total
+
+
+def _is_inside(path: str, directory: str):
+    # Trash folder in the cleared directory would be moved into itself
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    return os.path.commonpath((path, directory)) == directory
+
+
+def _rename_to_trash(directory: str, trash_directory: str, progress=None, stop=None):
+    directory = os.path.normpath(directory)
+    files = list_files(directory)
+    total = len(files)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    trash_path = os.path.join(trash_directory, f'{os.path.basename(directory)}-{stamp}')
+    for index in range(1, 100):
+        if not os.path.exists(trash_path):
+            break
+        trash_path = os.path.join(trash_directory, f'{os.path.basename(directory)}-{stamp}-{index}')
+    os.makedirs(trash_path)
+    # Only files are cleared, like in 'trash' mode, subfolders stay in place
+    for done, path in enumerate(files):
+        if stop and stop.is_set():
+            return done
+        os.rename(path, os.path.join(trash_path, os.path.basename(path)))
+        if progress and (done + 1) % TRASH_BATCH == 0:
+            progress(done + 1, total)
+    if progress:
+        progress(total, total)
+    return total
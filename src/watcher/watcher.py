@@ -0,0 +1,272 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def scan(directory: str, input_formats: list, recursive=False):
+    """
+    Size and modification time of image files in directory
+    :param recursive: True to include images from subfolders
+    :return: Dict of file path relative to directory with '/' separators: (size, mtime_ns)
+    """
+    files = {}
+    folders = ['']
+    while folders:
+        folder = folders.pop()
+        prefix = f'{folder}/' if folder else ''
+        try:
+            entries = os.scandir(os.path.join(directory, folder) if folder else directory)
+        except (FileNotFoundError, NotADirectoryError):
+            if not folder:
+                raise
+            # Subfolder removed while scanning
+            continue
+        with entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() in input_formats and entry.is_file():
+                    stat = entry.stat()
+                    files[prefix + entry.name] = stat.st_size, stat.st_mtime_ns
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    folders.append(prefix + entry.name)
+    return files
+
+
+class InotifyEvents:
+    """
+    Names of created, written and moved in files of the directory from Linux inotify
+    :param recursive: True to watch subfolders too, folders created later are watched when they appear
+    :raise OSError: If inotify is not available
+    """
+
+    def __init__(self, directory: str, recursive=False):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is available only on Linux')
+        self.directory = directory
+        self.recursive = recursive
+        # Watch descriptor: folder relative to directory, '' for directory itself
+        self.folders = {}
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        try:
+            self._add_watch('')
+            if recursive:
+                self._add_subfolders('')
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, folder: str):
+        path = os.path.join(self.directory, folder) if folder else self.directory
+        descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if descriptor < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f'inotify_add_watch failed for {path}')
+        self.folders[descriptor] = folder
+
+    def _add_subfolders(self, folder: str):
+        """
+        Watch the folder and its subfolders, directory itself is watched already
+        :return: Names of files already in them, they could be written before the watch was added
+        """
+        names = set()
+        for root, _, files in os.walk(os.path.join(self.directory, folder) if folder else self.directory):
+            relative = os.path.relpath(root, self.directory).replace(os.sep, '/')
+            if relative != '.':
+                try:
+                    self._add_watch(relative)
+                except OSError:
+                    # Removed while walking
+                    continue
+            prefix = '' if relative == '.' else f'{relative}/'
+            names.update(prefix + name for name in files)
+        return names
+
+    def wait(self, timeout: float):
+        """
+        Wait for events
+        :param timeout: Seconds to wait if there are no events
+        :return: Set of changed file names, None if events were lost and directory must be rescanned
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self.fd, 2 ** 16)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset < len(buffer):
+            descriptor, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                # Watched folder was removed
+                self.folders.pop(descriptor, None)
+            elif length and descriptor in self.folders:
+                folder = self.folders[descriptor]
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+                name = f'{folder}/{name}' if folder else name
+                if self.recursive and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    names.update(self._add_subfolders(name))
+                else:
+                    names.add(name)
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingEvents:
+    """
+    Names of new and changed files of the directory found by periodic scanning,
+    used where inotify is not available
+    :param interval: Seconds between scans
+    :param recursive: True to scan subfolders too
+    """
+
+    def __init__(self, directory: str, input_formats: list, interval=0.5, recursive=False):
+        self.directory = directory
+        self.input_formats = input_formats
+        self.interval = interval
+        self.recursive = recursive
+        self.files = scan(directory, input_formats, recursive)
+
+    def wait(self, timeout: float):
+        time.sleep(min(timeout, self.interval))
+        files = scan(self.directory, self.input_formats, self.recursive)
+        changed = {name for name, signature in files.items() if self.files.get(name) != signature}
+        self.files = files
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Watches input directory for new and changed images and groups them into batches.
+    A file is taken only when its size and modification time did not change for settle_time,
+    so files which are still being copied are not processed half-written.
+    All files settled at the same time are returned as one batch, files arriving while
+    the batch is processed are collected by the OS and returned together with the next one.
+    :param directory: Input directory
+    :param input_formats: List of allowed file suffixes
+    :param settle_time: Seconds without changes before the file is taken
+    :param poll_interval: Scan interval of polling fallback
+    :param use_inotify: False to always use polling
+    :param recursive: True to watch subfolders too, file names are then relative paths with '/' separators
+    """
+
+    def __init__(self, directory: str, input_formats: list, settle_time=0.25, poll_interval=0.5, use_inotify=True,
+                 recursive=False):
+        self.directory = directory
+        self.input_formats = input_formats
+        self.recursive = recursive
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        # File name: (size, mtime_ns, last change time)
+        self.pending = {}
+        self.backend = None
+
+    def open_events(self):
+        if self.use_inotify:
+            try:
+                return InotifyEvents(self.directory, self.recursive)
+            except (OSError, AttributeError):
+                pass
+        return PollingEvents(self.directory, self.input_formats, self.poll_interval, self.recursive)
+
+    def batches(self, stop, initial=True):
+        """
+        Generator of settled file name batches, runs until stop is set
+        :param stop: threading.Event
+        :param initial: True to return existing files first
+        :return: Generator of lists of file names
+        """
+        events = self.open_events()
+        self.backend = type(events).__name__
+        try:
+            if initial:
+                self._touch(scan(self.directory, self.input_formats, self.recursive))
+            while not stop.is_set():
+                names = events.wait(self._timeout())
+                if names is None:
+                    names = scan(self.directory, self.input_formats, self.recursive)
+                self._touch(names)
+                ready = self._settled()
+                if ready:
+                    yield ready
+        finally:
+            events.close()
+
+    def _timeout(self):
+        # Sleep until the next pending file may settle, stop is checked at least twice a second
+        if not self.pending:
+            return 0.5
+        now = time.monotonic()
+        oldest = min(changed for _, _, changed in self.pending.values())
+        return min(0.5, max(0.01, oldest + self.settle_time - now))
+
+    def _touch(self, names):
+        now = time.monotonic()
+        for name in names:
+            if os.path.splitext(name)[1].lower() in self.input_formats:
+                size, mtime_ns, _ = self.pending.get(name, (None, None, None))
+                self.pending[name] = size, mtime_ns, now
+
+    def _settled(self):
+        now = time.monotonic()
+        ready = []
+        for name, (size, mtime_ns, changed) in list(self.pending.items()):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # Removed or renamed before it settled
+                del self.pending[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[name] = stat.st_size, stat.st_mtime_ns, changed if size is None else now
+            elif now - changed >= self.settle_time:
+                del self.pending[name]
+                ready.append(name)
+        return sorted(ready)
+
+
+def watch_folder(runner, watcher, stop, on_report=None, progress=None):
+    """
+    Process images from watcher batches until stop is set, one pool is used for all batches
+    :param runner: BatchRunner
+    :param watcher: FolderWatcher
+    :param stop: threading.Event
+    :param on_report: Callable, receives BatchReport of each batch
+    :param progress: Callable, receives (done, total) of the current batch
+    """
+    with runner.make_executor() as pool:
+        for batch in watcher.batches(stop):
+            report = runner.run(batch, progress, pool=pool)
+            if on_report:
+                on_report(report)
@@ -1,11 +1,16 @@
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtWidgets import QDialog, QFileDialog
 
+from src.batch.batch import WORKER_ENGINES
 from src.config.config import Configuration
+from src.encoder.encoder import OUTPUT_FORMATS
 from src.window.interface.advanced_settings import Ui_Dialog as AdvancedSettingsDialog
 
 
 class AdvancedSettings(QDialog):
+    # Dict of config key and unsaved value while editing, None when the dialog is closed
+    edited = pyqtSignal(object)
+
     def __init__(self, parent):
         super(AdvancedSettings, self).__init__(parent=parent, flags=Qt.WindowCloseButtonHint)
         self.config = Configuration()
@@ -17,10 +22,24 @@ class AdvancedSettings(QDialog):
         self.ui.checkBox_crop.setChecked(self.config.config['advanced_settings']['crop'])
         self.ui.checkBox_square.setChecked(self.config.config['advanced_settings']['square'])
         self.ui.checkBox_fit.setChecked(self.config.config['advanced_settings']['fit'])
+        self.ui.checkBox_fast_decode.setChecked(self.config.config['advanced_settings']['fast_decode'])
 
         self.ui.checkBox_verbose.setChecked(self.config.config['verbose_errors'])
+        self.ui.checkBox_result_cache.setChecked(self.config.config['result_cache'])
+        self.ui.checkBox_resume.setChecked(self.config.config['resume_batches'])
+        self.ui.checkBox_recursive.setChecked(self.config.config['recursive_input'])
+        self.ui.checkBox_fast_clear.setChecked(self.config.config['clear_mode'] == 'rename')
+        self.ui.checkBox_duplicates.setChecked(self.config.config['duplicates']['detect'])
+        self.ui.checkBox_similar.setChecked(self.config.config['duplicates']['similar'])
+        self.ui.checkBox_retry_truncated.setChecked(self.config.config['retry_truncated'])
 
         self.ui.spinBox_worker.setValue(self.config.config['worker_limit'])
+        self.ui.spinBox_memory_budget.setValue(self.config.config['memory_budget_mb'])
+        self.ui.spinBox_strip_memory.setValue(self.config.config['strip_memory_mb'])
+        self.ui.comboBox_engine.addItems(WORKER_ENGINES)
+        self.ui.comboBox_engine.setCurrentText(self.config.config['worker_engine'])
+        self.ui.comboBox_output_format.addItems(OUTPUT_FORMATS)
+        self.ui.comboBox_output_format.setCurrentText(self.config.config['encoder']['format'])
 
         self.ui.spinBox_square_red.setValue(self.config.config['advanced_settings']['square_fill_color']['red'])
         self.ui.spinBox_square_green.setValue(self.config.config['advanced_settings']['square_fill_color']['green'])
@@ -30,25 +49,56 @@ class AdvancedSettings(QDialog):
         self.ui.spinBox_opaque_green.setValue(self.config.config['advanced_settings']['opaque_fill_color']['green'])
         self.ui.spinBox_opaque_blue.setValue(self.config.config['advanced_settings']['opaque_fill_color']['blue'])
 
+        for checkbox in (self.ui.checkBox_crop, self.ui.checkBox_square, self.ui.checkBox_fit):
+            checkbox.toggled.connect(self._edited)
+        for spinbox in (self.ui.spinBox_square_red, self.ui.spinBox_square_green, self.ui.spinBox_square_blue,
+                        self.ui.spinBox_opaque_red, self.ui.spinBox_opaque_green, self.ui.spinBox_opaque_blue):
+            spinbox.valueChanged.connect(self._edited)
+        self.finished.connect(lambda result: self.edited.emit({'advanced_settings': None}))
+
+    def _edited(self, *args):
+        self.edited.emit({'advanced_settings': self.advanced_settings()})
+
+    def advanced_settings(self):
+        return {
+            'crop': self.ui.checkBox_crop.isChecked(),
+            'square': self.ui.checkBox_square.isChecked(),
+            'fit': self.ui.checkBox_fit.isChecked(),
+            'fast_decode': self.ui.checkBox_fast_decode.isChecked(),
+            'square_fill_color': {
+                'red': self.ui.spinBox_square_red.value(),
+                'green': self.ui.spinBox_square_green.value(),
+                'blue': self.ui.spinBox_square_blue.value()
+            },
+            'opaque_fill_color': {
+                'red': self.ui.spinBox_opaque_red.value(),
+                'green': self.ui.spinBox_opaque_green.value(),
+                'blue': self.ui.spinBox_opaque_blue.value()
+            }
+        }
+
     # Save configuration on click 'OK' button
     def accept(self):
         self.config.config['verbose_errors'] = self.ui.checkBox_verbose.isChecked()
+        self.config.config['result_cache'] = self.ui.checkBox_result_cache.isChecked()
+        self.config.config['resume_batches'] = self.ui.checkBox_resume.isChecked()
+        self.config.config['recursive_input'] = self.ui.checkBox_recursive.isChecked()
+        self.config.config['clear_mode'] = 'rename' if self.ui.checkBox_fast_clear.isChecked() else 'trash'
+        self.config.config['duplicates'] = {
+            **self.config.config['duplicates'],
+            'detect': self.ui.checkBox_duplicates.isChecked(),
+            'similar': self.ui.checkBox_similar.isChecked()
+        }
+        self.config.config['retry_truncated'] = self.ui.checkBox_retry_truncated.isChecked()
         self.config.config['worker_limit'] = self.ui.spinBox_worker.value()
-        self.config.config['advanced_settings'] = {
-                'crop': self.ui.checkBox_crop.isChecked(),
-                'square': self.ui.checkBox_square.isChecked(),
-                'fit': self.ui.checkBox_fit.isChecked(),
-                'square_fill_color': {
-                    'red': self.ui.spinBox_square_red.value(),
-                    'green': self.ui.spinBox_square_green.value(),
-                    'blue': self.ui.spinBox_square_blue.value()
-                },
-                'opaque_fill_color': {
-                    'red': self.ui.spinBox_opaque_red.value(),
-                    'green': self.ui.spinBox_opaque_green.value(),
-                    'blue': self.ui.spinBox_opaque_blue.value()
-                }
-            }
+        self.config.config['worker_engine'] = self.ui.comboBox_engine.currentText()
+        self.config.config['memory_budget_mb'] = self.ui.spinBox_memory_budget.value()
+        self.config.config['encoder'] = {
+            **self.config.config['encoder'],
+            'format': self.ui.comboBox_output_format.currentText()
+        }
+        self.config.config['strip_memory_mb'] = self.ui.spinBox_strip_memory.value()
+        self.config.config['advanced_settings'] = self.advanced_settings()
 
         self.config.save()
         # Close the window
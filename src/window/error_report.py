@@ -0,0 +1,49 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QFileDialog, QHeaderView, QTableWidgetItem
+
+from src.errors import errors
+from src.window.interface.error_report import Ui_Dialog as ErrorReportDialog
+
+
+class ErrorReport(QDialog):
+    """
+    Failed images of one batch, shown once after it instead of a message box per image
+    :param records: Error records, see BatchReport.error_records()
+    :param summary: Text above the table
+    """
+
+    def __init__(self, parent, records: list, summary: str):
+        super(ErrorReport, self).__init__(parent=parent, flags=Qt.WindowCloseButtonHint)
+        self.ui = ErrorReportDialog()
+        self.ui.setupUi(self)
+        self.setWindowTitle('Errors')
+
+        self.records = records
+        self.ui.label_summary.setText(summary)
+        table = self.ui.tableWidget_errors
+        # Rows are filled unsorted, so every row keeps its record index
+        table.setSortingEnabled(False)
+        table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            for column, key in enumerate(('image_name', 'stage', 'exception', 'message')):
+                item = QTableWidgetItem(record[key])
+                item.setData(Qt.UserRole, row)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.itemSelectionChanged.connect(self.show_traceback)
+        table.selectRow(0)
+
+        self.ui.pushButton_export.clicked.connect(self.export)
+
+    def show_traceback(self):
+        items = self.ui.tableWidget_errors.selectedItems()
+        if items:
+            self.ui.plainTextEdit_traceback.setPlainText(self.records[items[0].data(Qt.UserRole)]['traceback'])
+
+    # Save all records to CSV or JSON file
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Errors', 'errors.csv', 'CSV (*.csv);;JSON (*.json)')
+        if path:
+            errors.dump(self.records, path)
@@ -101,6 +101,30 @@ class Ui_Dialog(object):
         self.spinBox_worker.setMaximum(128)
         self.spinBox_worker.setObjectName("spinBox_worker")
         self.horizontalLayout_4.addWidget(self.spinBox_worker)
+        self.label_memory_budget = QtWidgets.QLabel(Dialog)
+        self.label_memory_budget.setObjectName("label_memory_budget")
+        self.horizontalLayout_4.addWidget(self.label_memory_budget)
+        self.spinBox_memory_budget = QtWidgets.QSpinBox(Dialog)
+        self.spinBox_memory_budget.setButtonSymbols(QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.spinBox_memory_budget.setMaximum(1048576)
+        self.spinBox_memory_budget.setSingleStep(256)
+        self.spinBox_memory_budget.setObjectName("spinBox_memory_budget")
+        self.horizontalLayout_4.addWidget(self.spinBox_memory_budget)
+        self.label_strip_memory = QtWidgets.QLabel(Dialog)
+        self.label_strip_memory.setObjectName("label_strip_memory")
+        self.horizontalLayout_4.addWidget(self.label_strip_memory)
+        self.spinBox_strip_memory = QtWidgets.QSpinBox(Dialog)
+        self.spinBox_strip_memory.setButtonSymbols(QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.spinBox_strip_memory.setMaximum(65536)
+        self.spinBox_strip_memory.setSingleStep(64)
+        self.spinBox_strip_memory.setObjectName("spinBox_strip_memory")
+        self.horizontalLayout_4.addWidget(self.spinBox_strip_memory)
+        self.label_engine = QtWidgets.QLabel(Dialog)
+        self.label_engine.setObjectName("label_engine")
+        self.horizontalLayout_4.addWidget(self.label_engine)
+        self.comboBox_engine = QtWidgets.QComboBox(Dialog)
+        self.comboBox_engine.setObjectName("comboBox_engine")
+        self.horizontalLayout_4.addWidget(self.comboBox_engine)
         spacerItem6 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout_4.addItem(spacerItem6)
         self.gridLayout.addLayout(self.horizontalLayout_4, 11, 0, 1, 1)
@@ -115,24 +139,59 @@ class Ui_Dialog(object):
         self.checkBox_fit = QtWidgets.QCheckBox(Dialog)
         self.checkBox_fit.setObjectName("checkBox_fit")
         self.horizontalLayout.addWidget(self.checkBox_fit)
+        self.checkBox_fast_decode = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_fast_decode.setObjectName("checkBox_fast_decode")
+        self.horizontalLayout.addWidget(self.checkBox_fast_decode)
+        self.label_output_format = QtWidgets.QLabel(Dialog)
+        self.label_output_format.setObjectName("label_output_format")
+        self.horizontalLayout.addWidget(self.label_output_format)
+        self.comboBox_output_format = QtWidgets.QComboBox(Dialog)
+        self.comboBox_output_format.setObjectName("comboBox_output_format")
+        self.horizontalLayout.addWidget(self.comboBox_output_format)
         spacerItem7 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout.addItem(spacerItem7)
         self.gridLayout.addLayout(self.horizontalLayout, 2, 0, 1, 1)
         self.label_opaque_color = QtWidgets.QLabel(Dialog)
         self.label_opaque_color.setObjectName("label_opaque_color")
         self.gridLayout.addWidget(self.label_opaque_color, 7, 0, 1, 1)
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.checkBox_duplicates = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_duplicates.setObjectName("checkBox_duplicates")
+        self.horizontalLayout_6.addWidget(self.checkBox_duplicates)
+        self.checkBox_similar = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_similar.setObjectName("checkBox_similar")
+        self.horizontalLayout_6.addWidget(self.checkBox_similar)
+        self.checkBox_retry_truncated = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_retry_truncated.setObjectName("checkBox_retry_truncated")
+        self.horizontalLayout_6.addWidget(self.checkBox_retry_truncated)
+        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_6.addItem(spacerItem8)
+        self.gridLayout.addLayout(self.horizontalLayout_6, 13, 0, 1, 1)
         self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_5.setObjectName("horizontalLayout_5")
         self.checkBox_verbose = QtWidgets.QCheckBox(Dialog)
         self.checkBox_verbose.setObjectName("checkBox_verbose")
         self.horizontalLayout_5.addWidget(self.checkBox_verbose)
-        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-        self.horizontalLayout_5.addItem(spacerItem8)
+        self.checkBox_result_cache = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_result_cache.setObjectName("checkBox_result_cache")
+        self.horizontalLayout_5.addWidget(self.checkBox_result_cache)
+        self.checkBox_resume = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_resume.setObjectName("checkBox_resume")
+        self.horizontalLayout_5.addWidget(self.checkBox_resume)
+        self.checkBox_recursive = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_recursive.setObjectName("checkBox_recursive")
+        self.horizontalLayout_5.addWidget(self.checkBox_recursive)
+        self.checkBox_fast_clear = QtWidgets.QCheckBox(Dialog)
+        self.checkBox_fast_clear.setObjectName("checkBox_fast_clear")
+        self.horizontalLayout_5.addWidget(self.checkBox_fast_clear)
+        spacerItem9 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem9)
         self.buttonBox = QtWidgets.QDialogButtonBox(Dialog)
         self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
         self.buttonBox.setObjectName("buttonBox")
         self.horizontalLayout_5.addWidget(self.buttonBox)
-        self.gridLayout.addLayout(self.horizontalLayout_5, 13, 0, 1, 1)
+        self.gridLayout.addLayout(self.horizontalLayout_5, 14, 0, 1, 1)
         self.verticalLayout.addLayout(self.gridLayout)
 
         self.retranslateUi(Dialog)
@@ -152,11 +211,29 @@ class Ui_Dialog(object):
         self.label_opaque_green.setText(_translate("Dialog", "Green"))
         self.label_opaque_blue.setText(_translate("Dialog", "Blue"))
         self.label_worker.setText(_translate("Dialog", "Workers limit"))
+        self.label_memory_budget.setText(_translate("Dialog", "Memory, MB"))
+        self.label_strip_memory.setToolTip(_translate("Dialog", "Larger PNG and uncompressed TIFF images are decoded in strips, 0 to decode them whole"))
+        self.label_strip_memory.setText(_translate("Dialog", "Strips, MB"))
+        self.label_engine.setText(_translate("Dialog", "Engine"))
         self.checkBox_crop.setText(_translate("Dialog", "Cropping"))
         self.checkBox_square.setText(_translate("Dialog", "Squaring"))
         self.checkBox_fit.setText(_translate("Dialog", "Fitting"))
+        self.checkBox_fast_decode.setText(_translate("Dialog", "Fast decoding"))
+        self.label_output_format.setText(_translate("Dialog", "Output format"))
+        self.comboBox_output_format.setToolTip(_translate("Dialog", "auto saves JPEG, or PNG for images with transparency"))
         self.label_opaque_color.setText(_translate("Dialog", "Opaque fill color"))
+        self.checkBox_duplicates.setText(_translate("Dialog", "Link duplicates"))
+        self.checkBox_similar.setToolTip(_translate("Dialog", "Find the same photo saved again in another format or quality, decodes every image once more"))
+        self.checkBox_similar.setText(_translate("Dialog", "Compare similar images"))
+        self.checkBox_retry_truncated.setToolTip(_translate("Dialog", "Process images which failed to decode once more with truncated loading"))
+        self.checkBox_retry_truncated.setText(_translate("Dialog", "Retry damaged images"))
         self.checkBox_verbose.setText(_translate("Dialog", "Verbose errors"))
+        self.checkBox_result_cache.setText(_translate("Dialog", "Skip up to date"))
+        self.checkBox_resume.setToolTip(_translate("Dialog", "Continue the stopped batch of the same images and settings where it stopped"))
+        self.checkBox_resume.setText(_translate("Dialog", "Resume stopped batches"))
+        self.checkBox_recursive.setText(_translate("Dialog", "Include subfolders"))
+        self.checkBox_fast_clear.setToolTip(_translate("Dialog", "Move files of cleared directory to the trash folder next to input and output, renaming them without copying"))
+        self.checkBox_fast_clear.setText(_translate("Dialog", "Fast clearing"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'error_report.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_Dialog(object):
+    def setupUi(self, Dialog):
+        Dialog.setObjectName("Dialog")
+        Dialog.resize(900, 560)
+        self.verticalLayout = QtWidgets.QVBoxLayout(Dialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.label_summary = QtWidgets.QLabel(Dialog)
+        self.label_summary.setObjectName("label_summary")
+        self.verticalLayout.addWidget(self.label_summary)
+        self.tableWidget_errors = QtWidgets.QTableWidget(Dialog)
+        self.tableWidget_errors.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tableWidget_errors.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.tableWidget_errors.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tableWidget_errors.setObjectName("tableWidget_errors")
+        self.tableWidget_errors.setColumnCount(4)
+        self.tableWidget_errors.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.tableWidget_errors.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tableWidget_errors.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tableWidget_errors.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tableWidget_errors.setHorizontalHeaderItem(3, item)
+        self.tableWidget_errors.horizontalHeader().setStretchLastSection(True)
+        self.tableWidget_errors.verticalHeader().setVisible(False)
+        self.verticalLayout.addWidget(self.tableWidget_errors)
+        self.plainTextEdit_traceback = QtWidgets.QPlainTextEdit(Dialog)
+        self.plainTextEdit_traceback.setReadOnly(True)
+        self.plainTextEdit_traceback.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.plainTextEdit_traceback.setObjectName("plainTextEdit_traceback")
+        self.verticalLayout.addWidget(self.plainTextEdit_traceback)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.pushButton_export = QtWidgets.QPushButton(Dialog)
+        self.pushButton_export.setObjectName("pushButton_export")
+        self.horizontalLayout.addWidget(self.pushButton_export)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.buttonBox = QtWidgets.QDialogButtonBox(Dialog)
+        self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Close)
+        self.buttonBox.setObjectName("buttonBox")
+        self.horizontalLayout.addWidget(self.buttonBox)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.retranslateUi(Dialog)
+        self.buttonBox.rejected.connect(Dialog.reject)
+        QtCore.QMetaObject.connectSlotsByName(Dialog)
+
+    def retranslateUi(self, Dialog):
+        _translate = QtCore.QCoreApplication.translate
+        Dialog.setWindowTitle(_translate("Dialog", "Dialog"))
+        self.label_summary.setText(_translate("Dialog", "No errors"))
+        self.tableWidget_errors.setSortingEnabled(True)
+        item = self.tableWidget_errors.horizontalHeaderItem(0)
+        item.setText(_translate("Dialog", "File"))
+        item = self.tableWidget_errors.horizontalHeaderItem(1)
+        item.setText(_translate("Dialog", "Stage"))
+        item = self.tableWidget_errors.horizontalHeaderItem(2)
+        item.setText(_translate("Dialog", "Exception"))
+        item = self.tableWidget_errors.horizontalHeaderItem(3)
+        item.setText(_translate("Dialog", "Message"))
+        self.pushButton_export.setText(_translate("Dialog", "Export..."))
@@ -51,6 +51,10 @@ class Ui_MainWindow(object):
         self.pushButton_refresh_list = QtWidgets.QPushButton(self.centralwidget)
         self.pushButton_refresh_list.setObjectName("pushButton_refresh_list")
         self.verticalLayout_2.addWidget(self.pushButton_refresh_list)
+        self.pushButton_previews = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_previews.setCheckable(True)
+        self.pushButton_previews.setObjectName("pushButton_previews")
+        self.verticalLayout_2.addWidget(self.pushButton_previews)
         self.pushButton_clear_selection = QtWidgets.QPushButton(self.centralwidget)
         self.pushButton_clear_selection.setObjectName("pushButton_clear_selection")
         self.verticalLayout_2.addWidget(self.pushButton_clear_selection)
@@ -77,6 +81,10 @@ class Ui_MainWindow(object):
         self.pushButton_start_selected = QtWidgets.QPushButton(self.centralwidget)
         self.pushButton_start_selected.setObjectName("pushButton_start_selected")
         self.horizontalLayout.addWidget(self.pushButton_start_selected)
+        self.pushButton_watch = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_watch.setCheckable(True)
+        self.pushButton_watch.setObjectName("pushButton_watch")
+        self.horizontalLayout.addWidget(self.pushButton_watch)
         spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout.addItem(spacerItem2)
         self.gridLayout_2.addLayout(self.horizontalLayout, 1, 0, 1, 1)
@@ -95,10 +103,13 @@ class Ui_MainWindow(object):
         self.action_main_preferenses.setObjectName("action_main_preferenses")
         self.action_advanced_preferenses = QtWidgets.QAction(MainWindow)
         self.action_advanced_preferenses.setObjectName("action_advanced_preferenses")
+        self.action_preview = QtWidgets.QAction(MainWindow)
+        self.action_preview.setObjectName("action_preview")
         self.action_about = QtWidgets.QAction(MainWindow)
         self.action_about.setObjectName("action_about")
         self.menuMenu.addAction(self.action_main_preferenses)
         self.menuMenu.addAction(self.action_advanced_preferenses)
+        self.menuMenu.addAction(self.action_preview)
         self.menuMenu.addAction(self.action_about)
         self.menubar.addAction(self.menuMenu.menuAction())
 
@@ -113,14 +124,18 @@ class Ui_MainWindow(object):
         self.checkBox_no_rewrite.setText(_translate("MainWindow", "Do not rewrite files"))
         self.checkBox_preserve_formats.setText(_translate("MainWindow", "Preserve formats"))
         self.pushButton_refresh_list.setText(_translate("MainWindow", "Refresh"))
+        self.pushButton_previews.setToolTip(_translate("MainWindow", "Show image previews in the list"))
+        self.pushButton_previews.setText(_translate("MainWindow", "Previews"))
         self.pushButton_clear_selection.setText(_translate("MainWindow", "Clear selection"))
         self.pushButton_clear_input.setText(_translate("MainWindow", "Clear input"))
         self.pushButton_clear_output.setText(_translate("MainWindow", "Clear output"))
         self.pushButton_start.setText(_translate("MainWindow", "Process all"))
         self.pushButton_start_selected.setText(_translate("MainWindow", "Process selected"))
+        self.pushButton_watch.setText(_translate("MainWindow", "Watch input"))
         self.menuMenu.setTitle(_translate("MainWindow", "Settings"))
         self.action_main_preferenses.setText(_translate("MainWindow", "Main preferenses"))
         self.action_advanced_preferenses.setText(_translate("MainWindow", "Advanced preferenses"))
+        self.action_preview.setText(_translate("MainWindow", "Preview"))
         self.action_about.setText(_translate("MainWindow", "About"))
 
 
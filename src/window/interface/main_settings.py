@@ -125,6 +125,12 @@ class Ui_Dialog(object):
         self.verticalLayout.addLayout(self.horizontalLayout_2)
         spacerItem5 = QtWidgets.QSpacerItem(20, 13, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
         self.verticalLayout.addItem(spacerItem5)
+        self.label_renditions = QtWidgets.QLabel(Dialog)
+        self.label_renditions.setObjectName("label_renditions")
+        self.verticalLayout.addWidget(self.label_renditions)
+        self.lineEdit_renditions = QtWidgets.QLineEdit(Dialog)
+        self.lineEdit_renditions.setObjectName("lineEdit_renditions")
+        self.verticalLayout.addWidget(self.lineEdit_renditions)
         self.label_quality = QtWidgets.QLabel(Dialog)
         self.label_quality.setObjectName("label_quality")
         self.verticalLayout.addWidget(self.label_quality)
@@ -136,6 +142,15 @@ class Ui_Dialog(object):
         self.spinBox_quality.setMaximum(100)
         self.spinBox_quality.setObjectName("spinBox_quality")
         self.horizontalLayout_3.addWidget(self.spinBox_quality)
+        self.label_max_size = QtWidgets.QLabel(Dialog)
+        self.label_max_size.setObjectName("label_max_size")
+        self.horizontalLayout_3.addWidget(self.label_max_size)
+        self.spinBox_max_size = QtWidgets.QSpinBox(Dialog)
+        self.spinBox_max_size.setButtonSymbols(QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.spinBox_max_size.setMaximum(1048576)
+        self.spinBox_max_size.setSingleStep(50)
+        self.spinBox_max_size.setObjectName("spinBox_max_size")
+        self.horizontalLayout_3.addWidget(self.spinBox_max_size)
         spacerItem6 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout_3.addItem(spacerItem6)
         self.buttonBox = QtWidgets.QDialogButtonBox(Dialog)
@@ -164,4 +179,7 @@ class Ui_Dialog(object):
         self.label_crop_green.setText(_translate("Dialog", "Green"))
         self.label_crop_blue.setText(_translate("Dialog", "Blue"))
         self.label_crop_alpha.setText(_translate("Dialog", "Alpha"))
+        self.label_renditions.setText(_translate("Dialog", "Renditions (e.g. 600x600:subfolder=600 200x200:suffix=_small)"))
         self.label_quality.setText(_translate("Dialog", "Quality"))
+        self.label_max_size.setToolTip(_translate("Dialog", "Quality is lowered until JPEG or WebP output fits in this size, 0 for no limit"))
+        self.label_max_size.setText(_translate("Dialog", "Max size, KB"))
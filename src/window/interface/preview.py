@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'preview.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_Dialog(object):
+    def setupUi(self, Dialog):
+        Dialog.setObjectName("Dialog")
+        Dialog.resize(1000, 560)
+        self.verticalLayout = QtWidgets.QVBoxLayout(Dialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.label_before = QtWidgets.QLabel(Dialog)
+        self.label_before.setMinimumSize(QtCore.QSize(480, 480))
+        self.label_before.setAlignment(QtCore.Qt.AlignCenter)
+        self.label_before.setObjectName("label_before")
+        self.horizontalLayout.addWidget(self.label_before)
+        self.label_after = QtWidgets.QLabel(Dialog)
+        self.label_after.setMinimumSize(QtCore.QSize(480, 480))
+        self.label_after.setAlignment(QtCore.Qt.AlignCenter)
+        self.label_after.setObjectName("label_after")
+        self.horizontalLayout.addWidget(self.label_after)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        self.label_status = QtWidgets.QLabel(Dialog)
+        self.label_status.setObjectName("label_status")
+        self.verticalLayout.addWidget(self.label_status)
+
+        self.retranslateUi(Dialog)
+        QtCore.QMetaObject.connectSlotsByName(Dialog)
+
+    def retranslateUi(self, Dialog):
+        _translate = QtCore.QCoreApplication.translate
+        Dialog.setWindowTitle(_translate("Dialog", "Dialog"))
+        self.label_status.setText(_translate("Dialog", "Select an image in the list"))
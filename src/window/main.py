@@ -1,19 +1,38 @@
-from send2trash import send2trash
-from pathlib import Path
+import bisect
+import threading
+from collections import OrderedDict
+from functools import partial
 
-from PyQt5.QtCore import pyqtSlot, Qt, QThreadPool
-from PyQt5.QtWidgets import QMainWindow, QStyle
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QEvent, QSize, Qt, QThreadPool, QTimer
+from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtWidgets import QListView, QMainWindow, QPushButton, QStyle
 
+from src.batch.batch import BatchRunner, editor_options
 from src.config.config import Configuration
-from src.image_editor.image_editor import EditorManager
+from src.scanner.scanner import DirectoryScanner
+from src.thumbnails.thumbnails import THUMBNAIL_SIZE, ThumbnailCache
+from src.trash.trash import clear_directory
 from src.window.main_settings import MainSettings
 from src.window.advanced_settings import AdvancedSettings
+from src.watcher.watcher import FolderWatcher, watch_folder
 from src.window.about import About
+from src.window.error_report import ErrorReport
+from src.window.preview import Preview
 from src.window.interface.main import Ui_MainWindow as MainWindowDialog
 from src.worker.worker import Worker
 
+# More added and removed files than this rebuild the list widget instead of updating it
+MAX_LIST_CHANGES = 1000
+# Thumbnails of rows scrolled out of view longest ago are dropped above this number
+MAX_THUMBNAILS = 2000
+# Visible rows are checked this many milliseconds after the last scroll or resize
+THUMBNAIL_DELAY = 50
+
 
 class MainWindow(QMainWindow):
+    # Configuration callbacks can come from any thread, signal delivers them to the GUI thread
+    config_changed = pyqtSignal(object)
+
     def __init__(self):
         super(MainWindow, self).__init__(
             parent=None,
@@ -29,6 +48,9 @@ class MainWindow(QMainWindow):
         self.ui.action_advanced_preferenses.triggered.connect(self.show_advanced_settings)
         self.ui.action_advanced_preferenses.setIcon(self.style().standardIcon(QStyle.SP_DialogOpenButton))
 
+        self.ui.action_preview.triggered.connect(self.show_preview)
+        self.ui.action_preview.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
+
         self.ui.action_about.triggered.connect(self.show_about)
         self.ui.action_about.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxInformation))
 
@@ -41,22 +63,74 @@ class MainWindow(QMainWindow):
         self.ui.pushButton_clear_output.clicked.connect(self.clear_output_directory)
         self.ui.pushButton_clear_input.clicked.connect(self.clear_input_directory)
 
+        self.ui.pushButton_watch.toggled.connect(self.toggle_watch)
+        self.ui.pushButton_watch.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
+
         self.ui.pushButton_refresh_list.clicked.connect(self.refresh)
         self.ui.pushButton_refresh_list.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
 
         self.ui.pushButton_clear_selection.clicked.connect(self.clear_selection)
 
+        # Thumbnails are decoded in their own pool, so they never wait for a batch
+        self.thumbnails = ThumbnailCache()
+        self.thumbnail_pool = QThreadPool()
+        self.thumbnail_pool.setMaxThreadCount(2)
+        # Pool is idle yet, so pruning starts at once and is not dropped by request_visible_thumbnails()
+        self.thumbnail_pool.start(Worker(self.thumbnails.prune))
+        # Names of rows with thumbnail, in order of last view
+        self.thumbnail_names = OrderedDict()
+        self.thumbnail_pending = set()
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.setSingleShot(True)
+        self.thumbnail_timer.setInterval(THUMBNAIL_DELAY)
+        self.thumbnail_timer.timeout.connect(self.request_visible_thumbnails)
+        self.ui.listWidget.verticalScrollBar().valueChanged.connect(lambda value: self.thumbnail_timer.start())
+        self.ui.listWidget.viewport().installEventFilter(self)
+        self.ui.pushButton_previews.toggled.connect(self.toggle_previews)
+
+        # Preview dialog follows the current list item and settings being edited
+        self.preview = None
+        self.ui.listWidget.currentItemChanged.connect(self.show_current_preview)
+        for checkbox in (self.ui.checkBox_opaque, self.ui.checkBox_ignore_image_metadata):
+            checkbox.toggled.connect(lambda checked: self.update_preview())
+
         self.ui.progressBar.setValue(0)
+        # Batch controls are in the status bar, so they stay enabled while the rest of the window is disabled
+        self.pushButton_pause = QPushButton('Pause')
+        self.pushButton_pause.setCheckable(True)
+        self.pushButton_pause.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
+        self.pushButton_pause.toggled.connect(self.toggle_pause)
+        self.pushButton_cancel = QPushButton('Cancel')
+        self.pushButton_cancel.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self.pushButton_cancel.clicked.connect(self.cancel_batch)
+        for button in (self.pushButton_pause, self.pushButton_cancel):
+            button.hide()
+            self.statusBar().addPermanentWidget(button)
         self.dialogs = list()
-        self.progress_step = None
-        self.progress_current = 0
-        self.images_count = 0
         self.pool = QThreadPool()
+        self.runner = None
+        self.watch_stop = None
+        self.clear_stop = None
+        self.clear_button_text = None
+        # Error records of watched batches, shown when watching stops
+        self.watch_errors = []
+        self.scanner = None
+        # Sorted files shown in the list widget, compared with each new scan
+        self.listed_files = []
+        self.scanning = False
+        self.rescan = False
+        self.config = Configuration()
+        self.listing = None
+        self.config_changed.connect(self._config_changed)
+        self.config_callback = self.config_changed.emit
+        self.config.subscribe(self.config_callback)
+        self.ui.pushButton_previews.setChecked(self.config.config['show_previews'])
 
     # Show Main Settings dialog
     @pyqtSlot(name='ChangeDirectory')
     def show_main_settings(self):
         dialog = MainSettings(parent=self)
+        dialog.edited.connect(self.update_preview)
         self.dialogs.append(dialog)
         dialog.show()
 
@@ -64,9 +138,32 @@ class MainWindow(QMainWindow):
     @pyqtSlot(name='Settings')
     def show_advanced_settings(self):
         dialog = AdvancedSettings(parent=self)
+        dialog.edited.connect(self.update_preview)
         self.dialogs.append(dialog)
         dialog.show()
 
+    # Show Preview dialog, only one is opened
+    @pyqtSlot(name='Preview')
+    def show_preview(self):
+        if self.preview is None:
+            self.preview = Preview(self, self.collect_configuration)
+            self.dialogs.append(self.preview)
+        self.preview.show()
+        self.preview.raise_()
+        self.show_current_preview()
+
+    def show_current_preview(self, *args):
+        item = self.ui.listWidget.currentItem()
+        if self.preview is None or not self.preview.isVisible() or item is None:
+            return
+        name = item.text()
+        self.preview.show_image(name, f"{self.config.config['input_directory']}/{name}")
+
+    def update_preview(self, overrides=None):
+        # Overrides are unsaved settings of an open settings dialog
+        if self.preview is not None and self.preview.isVisible():
+            self.preview.update_settings(overrides or {})
+
     # Show About dialog
     @pyqtSlot(name='About')
     def show_about(self):
@@ -75,117 +172,394 @@ class MainWindow(QMainWindow):
         dialog.show()
 
     def refresh(self):
-        files = self.get_files_in_folder()
-        self.refresh_list_view(files)
+        # Directory is scanned in the thread pool, so huge folders do not freeze the window
+        if self.scanning:
+            self.rescan = True
+            return
+        self.scanning = True
+        settings = self.config.config
+        self.listing = settings['input_directory'], tuple(settings['input_formats']), settings['recursive_input']
+        worker = Worker(self.get_scanner(settings).scan, settings['input_directory'])
+        worker.signals.result.connect(self.refresh_list_view)
+        worker.signals.error.connect(self._report_error_in_worker)
+        worker.signals.finished.connect(self._scan_finished)
+        self.pool.start(worker)
+
+    def _scan_finished(self):
+        self.scanning = False
+        if self.rescan:
+            self.rescan = False
+            self.refresh()
 
     def refresh_list_view(self, files: list):
-        self.ui.listWidget.clear()
-        self.ui.listWidget.addItems(files)
-
-    @staticmethod
-    def get_files_in_folder():
-        settings = Configuration().config
-        files = Path(settings['input_directory']).iterdir()
-        images_in_folder = []
-        for file in (list(file for file in files)):
-            if file.suffix.lower() in settings['input_formats'] and file.is_file():
-                images_in_folder.append(file.name)
-        return images_in_folder
+        """
+        Update the list widget with the difference from the previous scan, selection is kept
+        :param files: Sorted list of file names
+        """
+        previous_files = self.listed_files
+        self.listed_files = files
+        previous, current = set(previous_files), set(files)
+        removed = sorted(previous - current)
+        added = sorted(current - previous)
+        list_widget = self.ui.listWidget
+        if len(removed) + len(added) > MAX_LIST_CHANGES:
+            # Input directory was changed or filled, rebuilding is cheaper
+            list_widget.clear()
+            list_widget.addItems(files)
+            self.thumbnail_names.clear()
+        else:
+            # Widget rows are in the same order as sorted lists, so rows are found by bisection.
+            # Removing from the end keeps rows of the rest unchanged.
+            for file in reversed(removed):
+                list_widget.takeItem(bisect.bisect_left(previous_files, file))
+                self.thumbnail_names.pop(file, None)
+            for file in added:
+                list_widget.insertItem(bisect.bisect_left(files, file), file)
+        self.thumbnail_timer.start()
+
+    def eventFilter(self, watched, event):
+        # Resized list shows other rows
+        if watched is self.ui.listWidget.viewport() and event.type() == QEvent.Resize:
+            self.thumbnail_timer.start()
+        return super(MainWindow, self).eventFilter(watched, event)
+
+    def toggle_previews(self, checked):
+        list_widget = self.ui.listWidget
+        if checked:
+            list_widget.setViewMode(QListView.IconMode)
+            list_widget.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            # Fixed grid keeps rows in order from top to bottom, see visible_rows()
+            list_widget.setGridSize(QSize(THUMBNAIL_SIZE + 40, THUMBNAIL_SIZE + 40))
+            list_widget.setResizeMode(QListView.Adjust)
+            list_widget.setMovement(QListView.Static)
+            list_widget.setWordWrap(True)
+            self.thumbnail_timer.start()
+        else:
+            list_widget.setViewMode(QListView.ListMode)
+            list_widget.setGridSize(QSize())
+            self.thumbnail_pool.clear()
+            self.thumbnail_pending.clear()
+            for name in self.thumbnail_names:
+                item = self._list_item(name)
+                if item:
+                    item.setIcon(QIcon())
+            self.thumbnail_names.clear()
+        if self.config.config['show_previews'] != checked:
+            self.config.config['show_previews'] = checked
+            self.config.save()
+
+    def visible_rows(self):
+        """
+        Rows of the list widget in its viewport
+        :return: Range of row numbers
+        """
+        list_widget = self.ui.listWidget
+        count = list_widget.count()
+        height = list_widget.viewport().height()
+        # Rows are laid out in order from top to bottom, the first visible one is found by bisection
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if list_widget.visualItemRect(list_widget.item(middle)).bottom() < 0:
+                low = middle + 1
+            else:
+                high = middle
+        last = low
+        while last < count and list_widget.visualItemRect(list_widget.item(last)).top() <= height:
+            last += 1
+        return range(low, last)
+
+    def request_visible_thumbnails(self):
+        if not self.ui.pushButton_previews.isChecked():
+            return
+        # Thumbnails of rows which were scrolled out of view are not decoded
+        self.thumbnail_pool.clear()
+        self.thumbnail_pending.clear()
+        input_directory = self.config.input_directory
+        for row in self.visible_rows():
+            name = self.ui.listWidget.item(row).text()
+            if name in self.thumbnail_names:
+                self.thumbnail_names.move_to_end(name)
+            elif name not in self.thumbnail_pending:
+                self.thumbnail_pending.add(name)
+                worker = Worker(self.thumbnails.thumbnail, f'{input_directory}/{name}')
+                worker.signals.result.connect(partial(self._thumbnail_ready, name))
+                self.thumbnail_pool.start(worker)
+
+    def _thumbnail_ready(self, name, data):
+        self.thumbnail_pending.discard(name)
+        item = self._list_item(name)
+        if data is None or item is None or not self.ui.pushButton_previews.isChecked():
+            return
+        pixmap = QPixmap()
+        pixmap.loadFromData(data, 'PNG')
+        item.setIcon(QIcon(pixmap))
+        self.thumbnail_names[name] = True
+        while len(self.thumbnail_names) > MAX_THUMBNAILS:
+            oldest, _ = self.thumbnail_names.popitem(last=False)
+            oldest_item = self._list_item(oldest)
+            if oldest_item:
+                oldest_item.setIcon(QIcon())
+
+    def _list_item(self, name):
+        # Item of the file name, None if it is not listed anymore
+        row = bisect.bisect_left(self.listed_files, name)
+        if row < self.ui.listWidget.count() and self.ui.listWidget.item(row).text() == name:
+            return self.ui.listWidget.item(row)
+        return None
+
+    def get_scanner(self, settings):
+        # Scanner keeps listings of unchanged folders between refreshes
+        formats = tuple(settings['input_formats'])
+        if not self.scanner or (self.scanner.input_formats, self.scanner.recursive) != (
+                formats, settings['recursive_input']):
+            self.scanner = DirectoryScanner(formats, settings['recursive_input'])
+        return self.scanner
+
+    def get_files_in_folder(self):
+        settings = self.config.config
+        return self.get_scanner(settings).scan(settings['input_directory'])
 
     def clear_selection(self):
         self.ui.listWidget.clearSelection()
 
     def clear_output_directory(self):
-        files = Path(Configuration().config['output_directory']).iterdir()
-        for file in (list(file for file in files)):
-            if file.is_file():
-                send2trash(str(file))
-        self.ui.progressBar.setValue(100)
-        self.ui.progressBar.setFormat('Output directory cleared')
+        self.start_clearing(self.config.output_directory, self.ui.pushButton_clear_output, 'Output')
 
     def clear_input_directory(self):
-        files = Path(Configuration().config['input_directory']).iterdir()
-        for file in (list(file for file in files)):
-            if file.is_file():
-                send2trash(str(file))
-        self.ui.progressBar.setValue(100)
-        self.ui.progressBar.setFormat('Input directory cleared')
+        self.start_clearing(self.config.input_directory, self.ui.pushButton_clear_input, 'Input')
+
+    def start_clearing(self, directory, button, name):
+        # Second click on the same button cancels clearing
+        if self.clear_stop:
+            self.clear_stop.set()
+            return
+        settings = self.config.config
+        self.clear_stop = threading.Event()
+        self.clear_button_text = button.text()
+        button.setText('Cancel')
+        for widget in (self.ui.pushButton_clear_input, self.ui.pushButton_clear_output, self.ui.pushButton_start,
+                       self.ui.pushButton_start_selected, self.ui.pushButton_watch):
+            widget.setEnabled(widget is button)
+        self.ui.progressBar.setValue(0)
+        self.ui.progressBar.setFormat(f'Clearing {name.lower()} directory %p%')
+
+        worker = Worker(clear_directory, directory, settings['clear_mode'], settings['trash_directory'],
+                        stop=self.clear_stop)
+        worker.kwargs['progress'] = worker.signals.progress.emit
+        worker.signals.progress.connect(self._update_clear_progress)
+        worker.signals.result.connect(lambda cleared: self._clearing_finished(cleared, name))
+        worker.signals.error.connect(self._report_error_in_worker)
+        worker.signals.finished.connect(lambda: self._clearing_stopped(button))
+        self.pool.start(worker)
+
+    def _update_clear_progress(self, done, total):
+        self.ui.progressBar.setValue(int(100 * done / total) if total else 100)
+
+    def _clearing_finished(self, cleared, name):
+        if self.clear_stop.is_set():
+            self.ui.progressBar.setFormat(f'{name} directory clearing cancelled, {cleared} files removed')
+        else:
+            self.ui.progressBar.setValue(100)
+            self.ui.progressBar.setFormat(f'{name} directory cleared')
+
+    def _clearing_stopped(self, button):
+        self.clear_stop = None
+        button.setText(self.clear_button_text)
+        self.ui.pushButton_clear_output.setEnabled(True)
+        self.ui.pushButton_watch.setEnabled(True)
+        # Watcher keeps processing buttons and input clearing disabled
+        for widget in (self.ui.pushButton_clear_input, self.ui.pushButton_start, self.ui.pushButton_start_selected):
+            widget.setEnabled(not self.watch_stop)
+        self.refresh()
 
     # Closing all opened widgets when main window was closed.
     def closeEvent(self, *args, **kwargs):
         for dialog in self.dialogs:
             dialog.close()
-
-    def start_reformat(self, images_to_work, settings, config):
+        self.config.unsubscribe(self.config_callback)
+        self.thumbnail_pool.clear()
+        if self.watch_stop:
+            self.watch_stop.set()
+        if self.runner:
+            # Images in work are finished, so no output is left half written
+            self.runner.control.cancel()
+
+    def start_reformat(self, images_to_work, settings, config, use_cache=False, use_journal=False):
         # Set main window disabled until work did not end.
-        self.setEnabled(False)
-        self.progress_current = 0
+        self.set_batch_running(True)
         self.ui.progressBar.setFormat('%p%')
-        self.ui.progressBar.setValue(self.progress_current)
+        self.ui.progressBar.setValue(0)
 
-        self.images_count = len(images_to_work)
         # Check if there is no files in directory
         if not images_to_work:
-            self.setEnabled(True)
+            self.set_batch_running(False)
             raise Exception("No files in input!")
 
-        # Percentage for each image
-        self.progress_step = 100 / self.images_count
-
-        # Set maximum threads in pool
-        self.pool.setMaxThreadCount(settings['worker_limit'])
-
-        # Start external thread with main work
-        for image_name in images_to_work:
-            # Create new worker for function
-            manager = EditorManager(
-                image_name,
-                settings['input_directory'],
-                settings['output_directory'],
-                settings['output_image_settings'],
-                **config)
-            worker = Worker(manager)
-            # Connect signal receiver with the progress bar updating method
-            worker.signals.finished.connect(self._update_progress_bar)
-            worker.signals.error.connect(self._error_occurred_in_worker)
-            # Run worker in thread pool
-            self.pool.start(worker)
-
-    def collect_configuration(self):
-        settings = Configuration().config
-        config_dict = {
-            'no_rewrite': self.ui.checkBox_no_rewrite.isChecked(),
-            'crop': settings['advanced_settings']['crop'],
-            'square': settings['advanced_settings']['square'],
-            'opaque': self.ui.checkBox_opaque.isChecked(),
-            'fit': settings['advanced_settings']['fit'],
-            'square_fill_color': settings['advanced_settings']['square_fill_color'],
-            'opaque_fill_color': settings['advanced_settings']['opaque_fill_color'],
-            'ignore_image_metadata': self.ui.checkBox_ignore_image_metadata.isChecked(),
-            'simple_formats': not self.ui.checkBox_preserve_formats.isChecked()
-            }
+        # One worker thread runs the whole batch, images are spread over the
+        # runner's own thread or process pool limited by worker_limit.
+        self.runner = runner = BatchRunner(settings, config, use_cache, use_journal=use_journal)
+        worker = Worker(runner.run, images_to_work)
+        worker.kwargs['progress'] = worker.signals.progress.emit
+        # Connect signal receivers with the progress bar updating methods
+        worker.signals.progress.connect(self._update_progress_bar)
+        worker.signals.result.connect(self._batch_finished)
+        worker.signals.error.connect(self._error_occurred_in_worker)
+        self.pool.start(worker)
+
+    def set_batch_running(self, running):
+        # Only pause and cancel buttons are enabled while batch runs
+        self.ui.centralwidget.setEnabled(not running)
+        self.ui.menubar.setEnabled(not running)
+        self.pushButton_pause.setChecked(False)
+        for button in (self.pushButton_pause, self.pushButton_cancel):
+            button.setEnabled(True)
+            button.setVisible(running)
+
+    def toggle_pause(self, checked):
+        # Images in work stop at their next stage and wait, queued ones are not started
+        if not self.runner or self.runner.control.cancelled:
+            return
+        if checked:
+            self.runner.control.pause()
+            self.ui.progressBar.setFormat('Paused %p%')
+        else:
+            self.runner.control.resume()
+            self.ui.progressBar.setFormat('%p%')
+
+    def cancel_batch(self):
+        # Queued images are dropped, images in work are finished or stopped at their next stage
+        self.runner.control.cancel()
+        self.pushButton_pause.setEnabled(False)
+        self.pushButton_cancel.setEnabled(False)
+        self.ui.progressBar.setFormat('Cancelling %p%')
+
+    def _config_changed(self, settings):
+        # List is scanned again only if input settings were changed
+        listing = settings['input_directory'], tuple(settings['input_formats']), settings['recursive_input']
+        if listing != self.listing:
+            self.refresh()
+        self.update_preview()
+
+    def collect_configuration(self, overrides=None):
+        # Overrides replace config keys, e.g. settings of the preview not saved yet
+        settings = {**self.config.snapshot(), **(overrides or {})}
+        config_dict = editor_options(
+            settings,
+            no_rewrite=self.ui.checkBox_no_rewrite.isChecked(),
+            opaque=self.ui.checkBox_opaque.isChecked(),
+            ignore_image_metadata=self.ui.checkBox_ignore_image_metadata.isChecked(),
+            simple_formats=not self.ui.checkBox_preserve_formats.isChecked())
         return settings, config_dict
 
     def start_reformat_all(self):
         settings, config = self.collect_configuration()
         files = self.get_files_in_folder()
         self.refresh_list_view(files)
-        return self.start_reformat(files, settings, config)
+        # Selected images are always processed, all of them only if something has changed.
+        # Only batches of all images are journaled, so processing a selection does not drop the stopped one.
+        return self.start_reformat(files, settings, config, use_cache=settings['result_cache'],
+                                   use_journal=settings['resume_batches'])
 
     def start_reformat_selected(self):
         settings, config = self.collect_configuration()
         files = [item.text() for item in self.ui.listWidget.selectedItems()]
         return self.start_reformat(files, settings, config)
 
-    def _update_progress_bar(self):
-        self.images_count -= 1
-        self.progress_current += self.progress_step
-        self.ui.progressBar.setValue(round(self.progress_current, 1))
-        # If 100% of work is done, set main window enabled again.
-        if self.images_count <= 0:
+    def toggle_watch(self, checked):
+        if not checked:
+            # Watcher finishes current batch and stops, see _watch_stopped()
+            if self.watch_stop:
+                self.watch_stop.set()
+                self.ui.pushButton_watch.setEnabled(False)
+            return
+        settings, config = self.collect_configuration()
+        self.ui.pushButton_start.setEnabled(False)
+        self.ui.pushButton_start_selected.setEnabled(False)
+        self.ui.pushButton_clear_input.setEnabled(False)
+        self.ui.progressBar.setValue(0)
+        self.ui.progressBar.setFormat('Watching input directory')
+
+        # Existing images are processed first, up to date ones are skipped
+        self.runner = runner = BatchRunner(settings, config, use_cache=settings['result_cache'])
+        self.watch_errors = []
+        watcher = FolderWatcher(settings['input_directory'], settings['input_formats'],
+                                recursive=settings['recursive_input'])
+        self.watch_stop = threading.Event()
+        worker = Worker(watch_folder, runner, watcher, self.watch_stop)
+        worker.kwargs['on_report'] = worker.signals.batch.emit
+        worker.kwargs['progress'] = worker.signals.progress.emit
+        worker.signals.progress.connect(self._update_progress_bar)
+        worker.signals.batch.connect(self._watch_batch_finished)
+        worker.signals.error.connect(self._error_occurred_in_worker)
+        worker.signals.finished.connect(self._watch_stopped)
+        self.pool.start(worker)
+
+    def _watch_batch_finished(self, report):
+        self.refresh()
+        self.ui.progressBar.setValue(100)
+        self.ui.progressBar.setFormat(f'Watching: {report.images_done} processed, {len(report.errors)} failed')
+        # Errors do not stop the watcher, they are shown in the status bar and reported when it stops
+        if report.errors:
+            self.watch_errors += report.error_records()
+            self.statusBar().showMessage(
+                '; '.join(f'{image_name}: {err}' for image_name, err in report.errors[:3]))
+
+    def _watch_stopped(self):
+        self.watch_stop = None
+        self.ui.pushButton_watch.setChecked(False)
+        self.ui.pushButton_watch.setEnabled(True)
+        self.ui.pushButton_start.setEnabled(True)
+        self.ui.pushButton_start_selected.setEnabled(True)
+        self.ui.pushButton_clear_input.setEnabled(True)
+        self.ui.progressBar.setFormat('%p%')
+        if self.watch_errors:
+            self.show_error_report(self.watch_errors, f'{len(self.watch_errors)} images failed while watching')
+            self.watch_errors = []
+
+    def _update_progress_bar(self, done, total):
+        self.ui.progressBar.setValue(int(100 * done / total))
+        stats = self.runner.scheduler.stats()
+        self.statusBar().showMessage(
+            f"Queued {stats['queue_depth']}, in work {stats['in_flight']} "
+            f"({stats['in_flight_bytes'] / 2 ** 20:.0f} of {stats['budget'] / 2 ** 20:.0f} MB)")
+
+    def _batch_finished(self, report):
+        # All work is done, set main window enabled again.
+        summary = report.summary()
+        notes = [f'{summary[key]} {text}' for key, text in (('skipped', 'up to date skipped'),
+                                                            ('duplicates', 'duplicates linked'),
+                                                            ('resumed', 'done before resume'),
+                                                            ('recovered', 'damaged recovered'),
+                                                            ('oversized', 'larger than max size')) if summary[key]]
+        if summary['cancelled']:
+            # Progress bar stays where the batch was stopped
+            self.ui.progressBar.setFormat(f"Cancelled, {summary['images']} of "
+                                          f"{summary['images'] + summary['errors'] + summary['cancelled']} "
+                                          f"images completed{''.join(f', {note}' for note in notes)}")
+        else:
             self.ui.progressBar.setValue(100)
-            self.setEnabled(True)
+            self.ui.progressBar.setFormat(f'%p% ({", ".join(notes)})' if notes else '%p%')
+        encoding = report.encoding_summary()
+        if encoding:
+            self.statusBar().showMessage('Encoded ' + ', '.join(
+                f"{stats['files']} {suffix} {stats['output_mb']} MB in {stats['seconds']} s"
+                for suffix, stats in encoding.items()))
+        self.set_batch_running(False)
+        if report.errors:
+            # One report for the whole batch, failed images did not stop it
+            self.show_error_report(report.error_records(), f"{summary['errors']} of "
+                                   f"{summary['errors'] + summary['images']} images failed")
+
+    def show_error_report(self, records, summary):
+        dialog = ErrorReport(self, records, summary)
+        self.dialogs.append(dialog)
+        dialog.show()
 
     def _error_occurred_in_worker(self, error):
-        self._update_progress_bar()
+        self.set_batch_running(False)
+        raise error
+
+    # Scan and clear errors do not stop a running batch, so the window stays as it is
+    def _report_error_in_worker(self, error):
         raise error
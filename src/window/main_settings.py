@@ -1,11 +1,14 @@
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QDialog, QFileDialog
+from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtWidgets import QDialog, QFileDialog, QMessageBox
 
-from src.config.config import Configuration
+from src.config.config import Configuration, check_renditions, format_rendition, parse_rendition
 from src.window.interface.main_settings import Ui_Dialog as MainSettingsDialog
 
 
 class MainSettings(QDialog):
+    # Dict of config key and unsaved value while editing, None when the dialog is closed
+    edited = pyqtSignal(object)
+
     def __init__(self, parent):
         super(MainSettings, self).__init__(parent=parent, flags=Qt.WindowCloseButtonHint)
         self.config = Configuration()
@@ -30,6 +33,34 @@ class MainSettings(QDialog):
         self.ui.spinBox_crop_alpha.setValue(self.config.config['output_image_settings']['color_limits']['alpha'])
 
         self.ui.spinBox_quality.setValue(self.config.config['output_image_settings']['quality'])
+        self.ui.spinBox_max_size.setValue(self.config.config['output_image_settings']['max_size_kb'])
+        self.ui.lineEdit_renditions.setText(
+            ' '.join(format_rendition(rendition) for rendition in self.config.config['output_image_settings']['renditions']))
+
+        for spinbox in (self.ui.spinBox_width, self.ui.spinBox_height, self.ui.spinBox_crop_red,
+                        self.ui.spinBox_crop_green, self.ui.spinBox_crop_blue, self.ui.spinBox_crop_alpha):
+            spinbox.valueChanged.connect(self._edited)
+        self.finished.connect(lambda result: self.edited.emit({'output_image_settings': None}))
+
+    def _edited(self, *args):
+        # Renditions are not previewed
+        self.edited.emit({'output_image_settings': self.output_image_settings(renditions=False)})
+
+    def output_image_settings(self, renditions=True):
+        return {
+            'width': self.ui.spinBox_width.value(),
+            'height': self.ui.spinBox_height.value(),
+            'quality': self.ui.spinBox_quality.value(),
+            'max_size_kb': self.ui.spinBox_max_size.value(),
+            'color_limits': {
+                'red': self.ui.spinBox_crop_red.value(),
+                'green': self.ui.spinBox_crop_green.value(),
+                'blue': self.ui.spinBox_crop_blue.value(),
+                'alpha': self.ui.spinBox_crop_alpha.value()
+            },
+            'renditions': [parse_rendition(text) for text in self.ui.lineEdit_renditions.text().split()]
+            if renditions else []
+        }
 
     # Open windows dialog for input folder
     def select_input_folder(self):
@@ -51,20 +82,17 @@ class MainSettings(QDialog):
 
     # Save configuration on click 'OK' button
     def accept(self):
+        # Shared configuration is changed only when all settings are valid, running batches can read it
+        try:
+            output_image_settings = self.output_image_settings()
+            check_renditions(output_image_settings['renditions'])
+        except ValueError as err:
+            QMessageBox.warning(self, 'Invalid Renditions', str(err))
+            return
         self.config.config['input_directory'] = self.ui.lineEdit_input_directory.text()
         self.config.config['output_directory'] = self.ui.lineEdit_output_directory.text()
         self.config.config['input_formats'] = self.ui.lineEdit_input_formats.text().split()
-        self.config.config['output_image_settings'] = {
-                'width': self.ui.spinBox_width.value(),
-                'height': self.ui.spinBox_height.value(),
-                'quality': self.ui.spinBox_quality.value(),
-                'color_limits': {
-                    'red': self.ui.spinBox_crop_red.value(),
-                    'green': self.ui.spinBox_crop_green.value(),
-                    'blue': self.ui.spinBox_crop_blue.value(),
-                    'alpha': self.ui.spinBox_crop_alpha.value()
-                }
-            }
+        self.config.config['output_image_settings'] = output_image_settings
 
         self.config.save()
         # Close the window
@@ -0,0 +1,150 @@
+import time
+
+from PyQt5.QtCore import Qt, QThreadPool, QTimer
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QDialog
+
+from src.loader.loader import ImageLoader
+from src.preview.preview import PreviewProcessor
+from src.window.interface.preview import Ui_Dialog as PreviewDialog
+from src.worker.worker import Worker
+
+# Settings changed within this many milliseconds are rendered once
+PREVIEW_DELAY = 20
+
+
+def to_qimage(image):
+    """
+    Copy PIL image to QImage, QImage can be made in any thread unlike QPixmap
+    """
+    image = image.convert('RGBA')
+    qimage = QImage(image.tobytes(), image.size[0], image.size[1], image.size[0] * 4, QImage.Format_RGBA8888)
+    # QImage does not own the buffer of bytes object
+    return qimage.copy()
+
+
+class Preview(QDialog):
+    """
+    Before and after images of one input image with current settings, including
+    not yet saved changes in settings dialogs. Only one render runs at a time, settings
+    changed while it runs are rendered once after it, results for another image are dropped.
+    Image is decoded again when decoder options change, for ex. ignoring image metadata.
+    :param collect: Callable which returns (settings, ImageEditor keyword arguments) with given
+    config overrides, see MainWindow.collect_configuration()
+    """
+
+    def __init__(self, parent, collect):
+        super(Preview, self).__init__(parent=parent, flags=Qt.WindowCloseButtonHint)
+        self.ui = PreviewDialog()
+        self.ui.setupUi(self)
+        self.setWindowTitle('Preview')
+
+        self.collect = collect
+        # Unsaved settings from open settings dialogs, by config key
+        self.overrides = {}
+        self.processor = None
+        self.image_name = None
+        self.path = None
+        # Key of the loader which decoded the processor's image
+        self.loader_key = None
+        self.rendering = False
+        self.render_again = False
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREVIEW_DELAY)
+        self.timer.timeout.connect(self.render)
+
+    def show_image(self, image_name, path):
+        if image_name == self.image_name:
+            return
+        self.image_name = image_name
+        self.path = path
+        _, options = self.collect(self.overrides)
+        self.load(ImageLoader.from_options(options))
+
+    def load(self, loader: ImageLoader):
+        self.processor = None
+        self.loader_key = loader.key
+        # Image that was not decoded yet is not needed anymore
+        self.pool.clear()
+        self.ui.label_status.setText(f'Loading {self.image_name}')
+        image_name = self.image_name
+        worker = Worker(PreviewProcessor, self.path, loader=loader)
+        worker.signals.result.connect(lambda processor: self._loaded(image_name, processor))
+        worker.signals.error.connect(lambda err: self._failed(image_name, err))
+        self.pool.start(worker)
+
+    def update_settings(self, overrides: dict):
+        """
+        :param overrides: Dict of config key and value, value None drops the override
+        """
+        for key, value in overrides.items():
+            if value is None:
+                self.overrides.pop(key, None)
+            else:
+                self.overrides[key] = value
+        self.schedule()
+
+    def schedule(self):
+        self.timer.start()
+
+    def render(self):
+        if self.image_name is None:
+            return
+        settings, options = self.collect(self.overrides)
+        loader = ImageLoader.from_options(options)
+        if loader.key != self.loader_key:
+            # Loaded processor renders the latest settings
+            self.load(loader)
+            return
+        if self.processor is None:
+            return
+        if self.rendering:
+            # Latest settings are rendered when current render finishes
+            self.render_again = True
+            return
+        self.rendering = True
+        worker = Worker(self._render, self.processor, settings['output_image_settings'], options)
+        image_name = self.image_name
+        worker.signals.result.connect(lambda result: self._rendered(image_name, result))
+        worker.signals.error.connect(lambda err: self._failed(image_name, err))
+        worker.signals.finished.connect(self._render_finished)
+        self.pool.start(worker)
+
+    @staticmethod
+    def _render(processor, image_settings, options):
+        started = time.perf_counter()
+        output_image = processor.render(image_settings, **options)
+        return to_qimage(output_image), output_image.size, time.perf_counter() - started
+
+    def _loaded(self, image_name, processor):
+        if image_name != self.image_name:
+            return
+        self.processor = processor
+        self.ui.label_before.setPixmap(QPixmap.fromImage(to_qimage(processor.before)))
+        self.render()
+
+    def _rendered(self, image_name, result):
+        if image_name != self.image_name:
+            return
+        qimage, size, seconds = result
+        self.ui.label_after.setPixmap(QPixmap.fromImage(qimage))
+        self.ui.label_status.setText(f'{self.image_name}: {size[0]}x{size[1]} preview in {seconds * 1000:.0f} ms')
+
+    def _render_finished(self):
+        self.rendering = False
+        if self.render_again:
+            self.render_again = False
+            self.render()
+
+    def _failed(self, image_name, err):
+        if image_name == self.image_name:
+            self.ui.label_status.setText(f'{self.image_name}: {err}')
+
+    def closeEvent(self, *args, **kwargs):
+        self.pool.clear()
+        self.image_name = None
+        self.processor = None
+        super(Preview, self).closeEvent(*args, **kwargs)
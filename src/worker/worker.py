@@ -5,6 +5,8 @@ class WorkerSignals(QObject):
     finished = pyqtSignal()
     error = pyqtSignal(Exception)
     result = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    batch = pyqtSignal(object)
 
 
 class Worker(QRunnable):